@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import re
 import sys
+from collections.abc import Iterator
+from typing import BinaryIO
 
 DIGIT_MAP: dict[str, str] = {
     "one": "1",
@@ -15,26 +17,65 @@ DIGIT_MAP: dict[str, str] = {
     "nine": "9",
 }
 
+CHUNK_SIZE = 1 << 20
 
-def make_digit_regex() -> re.Pattern:
-    digits = "|".join([r"\d", *DIGIT_MAP.keys()])
-    return re.compile(f"(?=({digits}))")
+# Spelled digits overlap ("eightwo"), so the last match is found by searching
+# the reversed line for the reversed words rather than by finding all matches.
+FORWARD_REGEX = re.compile("|".join([r"\d", *DIGIT_MAP]).encode())
+BACKWARD_REGEX = re.compile("|".join([r"\d", *(w[::-1] for w in DIGIT_MAP)]).encode())
+DIGIT_REGEX = re.compile(rb"\d")
 
+TOKEN_VALUES: dict[bytes, int] = {
+    **{str(d).encode(): d for d in range(10)},
+    **{w.encode(): int(d) for w, d in DIGIT_MAP.items()},
+    **{w[::-1].encode(): int(d) for w, d in DIGIT_MAP.items()},
+}
 
-def main():
-    lines = list(sys.stdin)
 
-    p1_ans = 0
-    for line in lines:
-        digits = [c for c in line if c.isdigit()]
-        p1_ans += int(digits[0] + digits[-1])
-    print(f"Part 1: {p1_ans}")
+def iter_lines(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yields lines from stream, holding at most one chunk in memory"""
+    tail = b""
+    while chunk := stream.read(chunk_size):
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def calibration_values(line: bytes) -> tuple[int, int]:
+    """Returns (part 1 value, part 2 value) for a single line"""
+    first = FORWARD_REGEX.search(line)
+    if first is None:
+        return 0, 0
+    reversed_line = line[::-1]
+    last = BACKWARD_REGEX.search(reversed_line)
+    p2 = TOKEN_VALUES[first.group()] * 10 + TOKEN_VALUES[last.group()]
 
+    # A spelled digit can only shadow a numeric one, so part 1 resumes the
+    # scan from where part 2 stopped instead of rescanning the line.
+    first_digit = (
+        first if first.group().isdigit() else DIGIT_REGEX.search(line, first.end())
+    )
+    if first_digit is None:
+        return 0, p2
+    last_digit = (
+        last
+        if last.group().isdigit()
+        else DIGIT_REGEX.search(reversed_line, last.end())
+    )
+    p1 = int(first_digit.group()) * 10 + int(last_digit.group())
+    return p1, p2
+
+
+def main():
+    p1_ans = 0
     p2_ans = 0
-    regex = make_digit_regex()
-    for line in lines:
-        digits = [DIGIT_MAP.get(d, d) for d in regex.findall(line)]
-        p2_ans += int(digits[0] + digits[-1])
+    for line in iter_lines(sys.stdin.buffer):
+        p1, p2 = calibration_values(line)
+        p1_ans += p1
+        p2_ans += p2
+    print(f"Part 1: {p1_ans}")
     print(f"Part 2: {p2_ans}")
 
 
@@ -1,55 +1,64 @@
 from __future__ import annotations
 
+import re
 import sys
+from collections.abc import Iterable
 
 import attrs
+import numpy as np
+
+COLORS = ("red", "green", "blue")
+CUBE_REGEX = re.compile(r"(\d+) (red|green|blue)")
 
 
 @attrs.frozen
-class CubeSet:
-    red: int = 0
-    blue: int = 0
-    green: int = 0
+class GameLog:
+    """All games as columns: ids and the max cubes seen per color"""
+
+    game_ids: np.ndarray
+    max_cubes: np.ndarray  # shape (n_games, len(COLORS))
 
     @classmethod
-    def parse(cls, cube_set_str: str) -> CubeSet:
-        res = cls()
-        for cube_str in cube_set_str.strip().split(", "):
-            num, color = cube_str.split(" ")
-            res = attrs.evolve(res, **{color: int(num)})
-        return res
+    def parse(cls, lines: Iterable[str]) -> GameLog:
+        color_index = {color: i for i, color in enumerate(COLORS)}
+        game_ids = []
+        max_cubes = []
+        for line in lines:
+            if not line.strip():
+                continue
+            game_id_str, cube_sets_str = line.split(": ")
+            maxes = [0] * len(COLORS)
+            for num, color in CUBE_REGEX.findall(cube_sets_str):
+                i = color_index[color]
+                maxes[i] = max(maxes[i], int(num))
+            game_ids.append(int(game_id_str.split(" ")[-1]))
+            max_cubes.append(maxes)
+        return cls(
+            np.array(game_ids, dtype=np.int64),
+            np.array(max_cubes, dtype=np.int64).reshape(-1, len(COLORS)),
+        )
 
+    def possible(self, limits: np.ndarray) -> np.ndarray:
+        """Which games are possible under each (red, green, blue) limit.
 
-@attrs.frozen
-class Game:
-    game_id: int
-    cube_sets: list[CubeSet]
-
-    def is_possible(self) -> bool:
-        red_required = max(s.red for s in self.cube_sets)
-        green_required = max(s.green for s in self.cube_sets)
-        blue_required = max(s.blue for s in self.cube_sets)
-        return red_required <= 12 and green_required <= 13 and blue_required <= 14
-
-    def min_power(self) -> int:
-        red_required = max(s.red for s in self.cube_sets)
-        blue_required = max(s.blue for s in self.cube_sets)
-        green_required = max(s.green for s in self.cube_sets)
-        return red_required * blue_required * green_required
+        limits has shape (3,) or (n_limits, 3); the result has shape (n_games,)
+        or (n_limits, n_games) respectively.
+        """
+        limits = np.asarray(limits)
+        return (self.max_cubes <= limits[..., np.newaxis, :]).all(axis=-1)
 
-    @classmethod
-    def parse(cls, game_str: str) -> Game:
-        game_id_str, cube_set_str = game_str.strip().split(": ")
-        game_id = int(game_id_str.split(" ")[-1])
-        cube_sets = [CubeSet.parse(s) for s in cube_set_str.split("; ")]
-        return cls(game_id, cube_sets)
+    def possible_id_sums(self, limits: np.ndarray) -> np.ndarray:
+        return self.possible(limits) @ self.game_ids
+
+    def min_powers(self) -> np.ndarray:
+        return self.max_cubes.prod(axis=1)
 
 
 def main():
-    games = [Game.parse(line) for line in sys.stdin]
+    game_log = GameLog.parse(sys.stdin)
 
-    print(f"Part 1: {sum(game.game_id for game in games if game.is_possible())}")
-    print(f"Part 2: {sum(game.min_power() for game in games)}")
+    print(f"Part 1: {game_log.possible_id_sums([12, 13, 14])}")
+    print(f"Part 2: {game_log.min_powers().sum()}")
 
 
 if __name__ == "__main__":
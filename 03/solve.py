@@ -1,67 +1,186 @@
 from __future__ import annotations
 
+import itertools
 import re
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
 
-NON_SYMBOLS = set("1234567890.")
+import numpy as np
 
+NUMBER_REGEX = re.compile(r"\d+")
 
-def is_symbol(r: int, c: int, schematic: list[str]) -> bool:
-    if 0 <= r < len(schematic) and 0 <= c < len(schematic[r]):
-        return schematic[r][c] not in NON_SYMBOLS
-    return False
+
+def load_schematic(schematic: list[str]) -> np.ndarray:
+    width = max((len(row) for row in schematic), default=0)
+    data = "".join(row.ljust(width, ".") for row in schematic).encode()
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(schematic), width)
+
+
+def symbol_mask(grid: np.ndarray) -> np.ndarray:
+    is_digit = (grid >= ord("0")) & (grid <= ord("9"))
+    return ~is_digit & (grid != ord("."))
+
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    """Marks every cell with a set cell in its 3x3 neighborhood"""
+    padded = np.pad(mask, 1)
+    n_rows, n_cols = mask.shape
+    res = np.zeros_like(mask)
+    for dr in range(3):
+        for dc in range(3):
+            res |= padded[dr : dr + n_rows, dc : dc + n_cols]
+    return res
+
+
+def number_labels(grid: np.ndarray) -> np.ndarray:
+    """Labels each digit with 1 + the index of its number in reading order"""
+    is_digit = (grid >= ord("0")) & (grid <= ord("9"))
+    starts = is_digit.copy()
+    starts[:, 1:] &= ~is_digit[:, :-1]
+    return np.where(is_digit, np.cumsum(starts).reshape(grid.shape), 0)
+
+
+def number_gear_pairs(
+    labels: np.ndarray, gears: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """(label, flat index of gear) for every number touching a gear, once each"""
+    padded = np.pad(labels, 1)
+    gear_rows, gear_cols = np.nonzero(gears)
+    # padded[r + dr, c + dc] is labels[r + dr - 1, c + dc - 1].
+    neighbors = np.concatenate(
+        [padded[gear_rows + dr, gear_cols + dc] for dr in range(3) for dc in range(3)]
+    )
+    gear_index = np.tile(gear_rows * labels.shape[1] + gear_cols, 9)
+    touching = neighbors > 0
+    pairs = np.unique(neighbors[touching] * labels.size + gear_index[touching])
+    return np.divmod(pairs, labels.size)
+
+
+def is_part(labels: np.ndarray, adjacent: np.ndarray, n_numbers: int) -> list[bool]:
+    """Whether each labelled number has a digit in adjacent"""
+    counts = np.bincount(
+        labels.ravel(), weights=adjacent.ravel(), minlength=n_numbers + 1
+    )
+    return (counts[1:] > 0).tolist()
 
 
 def get_part_numbers_and_gears(
     schematic: list[str],
-) -> list[tuple[int, tuple[int, int]]]:
-    regex = re.compile(r"\d+")
-    numbers_and_gears = []
-    for row_num, row in enumerate(schematic):
-        for match in regex.finditer(row):
-            start, end = match.span()
-
-            symbols = [
-                (r, c)
-                for r in range(row_num - 1, row_num + 2)
-                for c in range(start - 1, end + 1)
-                if is_symbol(r, c, schematic)
-            ]
-            if symbols:
-                numbers_and_gears.append(
-                    (
-                        int(match.group()),
-                        [(r, c) for r, c in symbols if schematic[r][c] == "*"],
-                    )
-                )
-    return numbers_and_gears
+) -> list[tuple[int, list[tuple[int, int]]]]:
+    grid = load_schematic(schematic)
+    labels = number_labels(grid)
+    numbers = [int(x) for row in schematic for x in NUMBER_REGEX.findall(row)]
+    parts = is_part(labels, dilate(symbol_mask(grid)), len(numbers))
+
+    gears: list[list[tuple[int, int]]] = [[] for _ in numbers]
+    pairs = number_gear_pairs(labels, grid == ord("*"))
+    for label, gear in zip(*(a.tolist() for a in pairs)):
+        gears[label - 1].append(divmod(gear, grid.shape[1]))
+
+    return [
+        (number, number_gears)
+        for number, number_gears, part in zip(numbers, gears, parts)
+        if part
+    ]
+
+
+def gear_ratio(gear_val: list[int]) -> int:
+    if len(gear_val) == 2:
+        x, y = gear_val
+        return x * y
+    return 0
+
+
+def stream_part_numbers_and_gear_ratios(
+    lines: Iterable[str],
+) -> Iterator[tuple[list[int], list[int]]]:
+    """Yields (part numbers, finished gear ratios) per row, holding three rows.
+
+    A gear can only touch numbers in the rows directly above and below it, so
+    once the row after a gear has been scanned its ratio is final. Each row's
+    symbol mask is dilated along the row once as it arrives, and a number's
+    neighborhood is the OR of that for the three rows in the window.
+    """
+    rows = (line.strip() for line in lines)
+
+    def scan(row: str) -> tuple[str, np.ndarray, np.ndarray, np.ndarray]:
+        # One spare cell so that a symbol at the end still marks the cell after it.
+        grid = load_schematic([row + "."])
+        return row, grid, dilate(symbol_mask(grid))[0], grid[0] == ord("*")
+
+    def widen(row: np.ndarray, width: int, fill: int = 0) -> np.ndarray:
+        return np.pad(row, (0, width - row.shape[-1]), constant_values=fill)
+
+    # The blank rows at either end stand in for the edges of the schematic.
+    window = deque([scan("")], maxlen=3)
+    gear_vals: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+    for row_num, row in enumerate(itertools.chain(rows, [""])):
+        window.append(scan(row))
+        if len(window) < 3:
+            continue
+        mid = row_num - 1
+        # Rows can differ in length, so line the window up on the longest.
+        width = max(grid.shape[1] for _, grid, _, _ in window)
+        (
+            (_, _, above, gears_above),
+            (text, grid, near, gears),
+            (_, _, below, gears_below),
+        ) = (
+            (text, widen(grid, width, ord(".")), widen(near, width), widen(gear, width))
+            for text, grid, near, gear in window
+        )
+
+        numbers = [int(x) for x in NUMBER_REGEX.findall(text)]
+        labels = np.zeros((3, grid.shape[1]), dtype=np.int64)
+        labels[1] = number_labels(grid)[0]
+        parts = is_part(labels[1], above | near | below, len(numbers))
+        part_numbers = [number for number, part in zip(numbers, parts) if part]
+
+        pairs = number_gear_pairs(labels, np.stack([gears_above, gears, gears_below]))
+        for label, gear in zip(*(a.tolist() for a in pairs)):
+            r, c = divmod(gear, grid.shape[1])
+            gear_vals[(mid - 1 + r, c)].append(numbers[label - 1])
+
+        finished = [gear for gear in gear_vals if gear[0] < mid]
+        yield part_numbers, [gear_ratio(gear_vals.pop(gear)) for gear in finished]
+
+    yield [], [gear_ratio(vals) for vals in gear_vals.values()]
 
 
 def get_gear_ratios(
-    part_numbers_and_gears: list[tuple[int, tuple[int, int]]],
+    part_numbers_and_gears: list[tuple[int, list[tuple[int, int]]]],
 ) -> list[int]:
     gear_vals = defaultdict(list)
     for part_number, gears in part_numbers_and_gears:
         for gear in gears:
             gear_vals[gear].append(part_number)
 
-    gear_ratios = []
-    for gear_val in gear_vals.values():
-        if len(gear_val) == 2:
-            x, y = gear_val
-            gear_ratios.append(x * y)
-    return gear_ratios
+    return [gear_ratio(vals) for vals in gear_vals.values()]
 
 
-def main():
-    schematic = [line.strip() for line in sys.stdin.readlines()]
+def main(stream: bool = False):
+    """Solves the whole schematic at once, or row by row in constant memory.
 
-    part_numbers_and_gears = get_part_numbers_and_gears(schematic)
+    Streaming costs a few numpy calls per row, so it is slower than the
+    whole-grid pass and only worth it for inputs that don't fit in memory.
+    """
+    if stream:
+        p1_ans = 0
+        p2_ans = 0
+        for part_numbers, gear_ratios in stream_part_numbers_and_gear_ratios(sys.stdin):
+            p1_ans += sum(part_numbers)
+            p2_ans += sum(gear_ratios)
+    else:
+        part_numbers_and_gears = get_part_numbers_and_gears(
+            [line.strip() for line in sys.stdin]
+        )
+        p1_ans = sum(number for number, _ in part_numbers_and_gears)
+        p2_ans = sum(get_gear_ratios(part_numbers_and_gears))
 
-    print(f"Part 1: {sum(x for x, _ in part_numbers_and_gears)}")
-    print(f"Part 2: {sum(get_gear_ratios(part_numbers_and_gears))}")
+    print(f"Part 1: {p1_ans}")
+    print(f"Part 2: {p2_ans}")
 
 
 if __name__ == "__main__":
-    main()
+    main(stream="--stream" in sys.argv[1:])
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import sys
+from collections import defaultdict
 
 import attrs
 
 
+def to_bitmask(numbers: list[str]) -> int:
+    mask = 0
+    for x in numbers:
+        mask |= 1 << int(x)
+    return mask
+
+
 @attrs.frozen
 class Card:
     card_id: int
-    winning_numbers: set[int]
-    picked_numbers: set[int]
+    winning_mask: int
+    picked_mask: int
 
     @classmethod
     def parse(cls, card_str: str) -> Card:
@@ -17,29 +25,40 @@ class Card:
         winning_str, picked_str = numbers_str.split(" | ")
         return cls(
             card_id=int(card_id_str.split(" ")[-1]),
-            winning_numbers={int(x) for x in winning_str.split()},
-            picked_numbers={int(x) for x in picked_str.split()},
+            winning_mask=to_bitmask(winning_str.split()),
+            picked_mask=to_bitmask(picked_str.split()),
         )
 
     def n_matches(self) -> int:
-        return len([x for x in self.picked_numbers if x in self.winning_numbers])
+        return (self.winning_mask & self.picked_mask).bit_count()
 
     def score(self) -> int:
-        n_matches = len([x for x in self.picked_numbers if x in self.winning_numbers])
-        return 0 if n_matches == 0 else 2 ** (n_matches - 1)
+        n_matches = self.n_matches()
+        return 0 if n_matches == 0 else 1 << (n_matches - 1)
 
 
 def main():
-    cards = [Card.parse(line) for line in sys.stdin]
-    n_matches = [card.n_matches() for card in cards]
+    total_score = 0
+    total_copies = 0
+
+    # Difference array over card indices: a card with n matches adds its copies
+    # to the next n cards, i.e. +copies at i + 1 and -copies at i + n + 1.
+    copy_deltas: defaultdict[int, int] = defaultdict(int)
+    won_copies = 0
+    for i, line in enumerate(line for line in sys.stdin if line.strip()):
+        card = Card.parse(line)
+        n_matches = card.n_matches()
+        total_score += card.score()
 
-    print(f"Part 1: {sum(0 if n == 0 else 2 ** (n-1) for n in n_matches)}")
+        won_copies += copy_deltas.pop(i, 0)
+        copies = 1 + won_copies
+        total_copies += copies
+        if n_matches:
+            copy_deltas[i + 1] += copies
+            copy_deltas[i + n_matches + 1] -= copies
 
-    copies = [1] * len(cards)
-    for i, n in enumerate(n_matches):
-        for j in range(n):
-            copies[i + j + 1] += copies[i]
-    print(f"Part 2: {sum(copies)}")
+    print(f"Part 1: {total_score}")
+    print(f"Part 2: {total_copies}")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import bisect
+import functools
 import itertools
+import math
 import sys
 
 import attrs
+import numpy as np
 
 
 @attrs.frozen
@@ -19,25 +23,101 @@ class Range:
         return self.start >= self.end
 
 
-@attrs.define
+def coalesce(ranges: list[Range]) -> list[Range]:
+    """Merges overlapping and adjacent ranges, dropping empty ones"""
+    merged: list[Range] = []
+    for r in sorted(ranges, key=lambda r: r.start):
+        if r.empty:
+            continue
+        if merged and r.start <= merged[-1].end:
+            merged[-1] = Range(merged[-1].start, max(merged[-1].end, r.end))
+        else:
+            merged.append(r)
+    return merged
+
+
+@attrs.frozen
 class RangeMap:
-    ranges: dict[Range, int]
+    """Piecewise offset map over the integers.
+
+    Piece i covers [breakpoints[i - 1], breakpoints[i]) and shifts by diffs[i],
+    where the first and last pieces are unbounded.
+    """
+
+    breakpoints: list[int]
+    diffs: list[int]
+
+    @classmethod
+    def parse(cls, lines: list[str]) -> RangeMap:
+        entries = sorted(
+            (tuple(map(int, line.split())) for line in lines[1:]),
+            key=lambda entry: entry[1],
+        )
+        breakpoints = []
+        diffs = [0]
+        for dest_start, src_start, length in entries:
+            if breakpoints and breakpoints[-1] == src_start:
+                diffs[-1] = dest_start - src_start
+            else:
+                breakpoints.append(src_start)
+                diffs.append(dest_start - src_start)
+            breakpoints.append(src_start + length)
+            diffs.append(0)
+        return cls(breakpoints, diffs).simplify()
+
+    def simplify(self) -> RangeMap:
+        """Drops breakpoints between pieces with the same diff"""
+        breakpoints = []
+        diffs = [self.diffs[0]]
+        for bp, diff in zip(self.breakpoints, self.diffs[1:]):
+            if diff != diffs[-1]:
+                breakpoints.append(bp)
+                diffs.append(diff)
+        return RangeMap(breakpoints, diffs)
+
+    def pieces(self) -> list[tuple[float, float, int]]:
+        bounds = [-math.inf, *self.breakpoints, math.inf]
+        return [
+            (lo, hi, diff)
+            for (lo, hi), diff in zip(itertools.pairwise(bounds), self.diffs)
+        ]
+
+    def compose(self, other: RangeMap) -> RangeMap:
+        """The map that applies self, then other"""
+        breakpoints = []
+        diffs = []
+        for lo, hi, diff in self.pieces():
+            if diffs:
+                breakpoints.append(lo)
+            # Split this piece wherever its image crosses one of other's breakpoints.
+            first = bisect.bisect_right(other.breakpoints, lo + diff)
+            last = bisect.bisect_left(other.breakpoints, hi + diff)
+            diffs.append(diff + other.diffs[first])
+            for k in range(first, last):
+                breakpoints.append(other.breakpoints[k] - diff)
+                diffs.append(diff + other.diffs[k + 1])
+        return RangeMap(breakpoints, diffs).simplify()
 
     def query_ranges(self, ranges: list[Range]) -> list[Range]:
         ret = []
-
         for range_ in ranges:
-            for r, diff in self.ranges.items():
-                intersection = range_.intersect(r)
-                if not intersection.empty:
-                    ret.append(
-                        Range(intersection.start + diff, intersection.end + diff)
-                    )
-
-        return ret
-
-    def query_points(self, points: list[int]) -> list[int]:
-        return [r.start for r in self.query_ranges([Range(p, p + 1) for p in points])]
+            if range_.empty:
+                continue
+            k = bisect.bisect_right(self.breakpoints, range_.start)
+            start = range_.start
+            while start < range_.end:
+                end = range_.end
+                if k < len(self.breakpoints):
+                    end = min(end, self.breakpoints[k])
+                ret.append(Range(start + self.diffs[k], end + self.diffs[k]))
+                start = end
+                k += 1
+        return coalesce(ret)
+
+    def query_points(self, points: list[int] | np.ndarray) -> np.ndarray:
+        points = np.asarray(points, dtype=np.int64)
+        idx = np.searchsorted(self.breakpoints, points, side="right")
+        return points + np.asarray(self.diffs, dtype=np.int64)[idx]
 
 
 def main():
@@ -47,35 +127,16 @@ def main():
         if key
     )
 
-    maps = []
-    for lines in map_line_lists:
-        range_dict = {}
-        for line in lines[1:]:
-            dest_start, src_start, length = map(int, line.split())
-            diff = dest_start - src_start
-            range_dict[Range(src_start, src_start + length)] = diff
-
-        # Fill gaps
-        sorted_ranges = sorted(range_dict.keys(), key=lambda x: x.start)
-        for r1, r2 in itertools.pairwise(sorted_ranges):
-            range_dict[Range(r1.end, r2.start)] = r1.end
-        range_dict[Range(0, sorted_ranges[0].start)] = 0
-        range_dict[Range(sorted_ranges[-1].end, 10**12)] = 0
-
-        maps.append(RangeMap(range_dict))
+    maps = [RangeMap.parse(lines) for lines in map_line_lists]
+    seed_to_location = functools.reduce(RangeMap.compose, maps)
 
     seeds = [int(x) for x in seeds_line[0].split()[1:]]
     seed_ranges = [
         Range(start, start + length) for start, length in zip(seeds[::2], seeds[1::2])
     ]
 
-    for m in maps:
-        seeds = m.query_points(seeds)
-    print(f"Part 1: {min(seeds)}")
-
-    for m in maps:
-        seed_ranges = m.query_ranges(seed_ranges)
-    print(f"Part 2: {min(r.start for r in seed_ranges)}")
+    print(f"Part 1: {seed_to_location.query_points(seeds).min()}")
+    print(f"Part 2: {seed_to_location.query_ranges(seed_ranges)[0].start}")
 
 
 if __name__ == "__main__":
@@ -1,33 +1,74 @@
 from __future__ import annotations
 
-import functools
 import math
-import operator
+
+import numpy as np
+
+# Races below these bounds are solved in int64 without overflow: time**2 and
+# 4 * distance both stay under 2**62.
+MAX_BATCH_TIME = 2**31
+MAX_BATCH_DISTANCE = 2**60
 
 
 def solve(time: int, distance: int) -> int:
     # if we hold for H, the distance we'll go is (time - H) * H
-    # we want to find H s.t. (time - H) * H = distance
-    # rewriting this, we get -H^2 + H*time - distance = 0
-    # solutions are given by quadratic formula.
-    a = -1
-    b = time
-    c = -distance
-    discriminant = (b**2 - 4 * a * c) ** 0.5
-    h_low, h_high = sorted(
-        [(-b + discriminant) / (2 * a), (-b - discriminant) / (2 * a)]
+    # we want to find H s.t. (time - H) * H > distance
+    # rewriting this, we get H^2 - H*time + distance < 0
+    # whose roots are (time -/+ sqrt(time^2 - 4*distance)) / 2.
+    discriminant = time * time - 4 * distance
+    if discriminant <= 0:
+        return 0
+    # With s = isqrt(discriminant), the first winning hold is one of
+    # (time - s) // 2 and the value just after it.
+    h_low = (time - math.isqrt(discriminant)) // 2
+    if h_low * (time - h_low) <= distance:
+        h_low += 1
+    h_low = max(h_low, 0)
+    # Winning holds are symmetric around time / 2.
+    return max(time - 2 * h_low + 1, 0)
+
+
+def _solve_int64(times: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    discriminant = times * times - 4 * distances
+    sqrt = np.sqrt(np.maximum(discriminant, 0).astype(np.float64)).astype(np.int64)
+    # Correct the float sqrt to the exact integer square root.
+    sqrt -= sqrt * sqrt > discriminant
+    sqrt += (sqrt + 1) * (sqrt + 1) <= discriminant
+
+    h_low = (times - sqrt) // 2
+    h_low += h_low * (times - h_low) <= distances
+    h_low = np.maximum(h_low, 0)
+    ways = np.maximum(times - 2 * h_low + 1, 0)
+    return np.where(discriminant > 0, ways, 0)
+
+
+def solve_batch(times, distances) -> np.ndarray:
+    """Vectorized solve over many races.
+
+    Races too large for exact int64 arithmetic fall back to solve(), in which
+    case the result has dtype object.
+    """
+    times = np.asarray(times)
+    distances = np.asarray(distances)
+    fits = np.asarray(
+        (times < MAX_BATCH_TIME) & (distances < MAX_BATCH_DISTANCE), dtype=bool
+    )
+    if fits.all():
+        return _solve_int64(times.astype(np.int64), distances.astype(np.int64))
+
+    res = np.empty(times.shape, dtype=object)
+    res[fits] = _solve_int64(
+        times[fits].astype(np.int64), distances[fits].astype(np.int64)
     )
-    h_low = max(0, math.floor(h_low) + 1)
-    h_high = min(time, math.ceil(h_high) - 1)
-    return h_high - h_low + 1
+    res[~fits] = [solve(int(t), int(d)) for t, d in zip(times[~fits], distances[~fits])]
+    return res
 
 
 def main():
     times = [int(x) for x in input().split()[1:]]
     distances = [int(x) for x in input().split()[1:]]
 
-    solutions = [solve(time, distance) for time, distance in zip(times, distances)]
-    print(f"Part 1: {functools.reduce(operator.mul, solutions)}")
+    print(f"Part 1: {math.prod(solve_batch(times, distances).tolist())}")
 
     big_time = int("".join(str(t) for t in times))
     big_distance = int("".join(str(d) for d in distances))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import sys
+from enum import IntEnum
+
+import numpy as np
+
+
+class HandType(IntEnum):
+    HighCard = 1
+    OnePair = 2
+    TwoPair = 3
+    ThreeOfAKind = 4
+    FullHouse = 5
+    FourOfAKind = 6
+    FiveOfAKind = 7
+
+
+# Hand type by card counts, largest count first.
+HAND_TYPES: dict[tuple[int, ...], HandType] = {
+    (1, 1, 1, 1, 1): HandType.HighCard,
+    (2, 1, 1, 1): HandType.OnePair,
+    (2, 2, 1): HandType.TwoPair,
+    (3, 1, 1): HandType.ThreeOfAKind,
+    (3, 2): HandType.FullHouse,
+    (4, 1): HandType.FourOfAKind,
+    (5,): HandType.FiveOfAKind,
+}
+
+RANKS = {c: i for i, c in enumerate("23456789TJQKA")}
+JOKER_RANKS = {c: i for i, c in enumerate("J23456789TQKA")}
+
+
+def count_signature(hand: str, jokers: bool = False) -> tuple[int, ...]:
+    if not jokers:
+        return tuple(sorted((hand.count(c) for c in set(hand)), reverse=True))
+    counts = sorted((hand.count(c) for c in set(hand) if c != "J"), reverse=True)
+    # A joker is always best spent copying the most common card.
+    n_jokers = hand.count("J")
+    if not counts:
+        return (n_jokers,)
+    return (counts[0] + n_jokers, *counts[1:])
+
+
+def hand_key(hand: str, jokers: bool = False) -> int:
+    """Packs the hand type and each card's rank, 4 bits apiece, into one int"""
+    ranks = JOKER_RANKS if jokers else RANKS
+    key = HAND_TYPES[count_signature(hand, jokers)].value
+    for c in hand:
+        key = key << 4 | ranks[c]
+    return key
+
+
+def total_winnings(keys: np.ndarray, bets: np.ndarray) -> int:
+    order = np.argsort(keys, kind="stable")
+    return int((np.arange(1, len(keys) + 1) * bets[order]).sum())
+
+
+def main():
+    hands = []
+    bets = []
+    for line in sys.stdin:
+        hand, bet = line.split()
+        hands.append(hand)
+        bets.append(int(bet))
+    bets = np.array(bets, dtype=np.int64)
+
+    keys = np.array([hand_key(hand) for hand in hands], dtype=np.int64)
+    print(f"Part 1: {total_winnings(keys, bets)}")
+
+    joker_keys = np.array([hand_key(hand, jokers=True) for hand in hands], np.int64)
+    print(f"Part 2: {total_winnings(joker_keys, bets)}")
+
+
+if __name__ == "__main__":
+    main()
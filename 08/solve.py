@@ -4,13 +4,120 @@ import itertools
 import math
 import re
 import sys
+from functools import cached_property
 
+import attrs
+import numpy as np
 
-def path_length(node: str, directions: str, lookup: dict[tuple[str, str], str]) -> int:
-    for step, direction in enumerate(itertools.cycle(directions)):
-        if node.endswith("Z"):
+
+def crt(r1: int, m1: int, r2: int, m2: int) -> int | None:
+    """Solves x = r1 (mod m1), x = r2 (mod m2) for x mod lcm(m1, m2)"""
+    g = math.gcd(m1, m2)
+    if (r2 - r1) % g:
+        return None
+    k = (r2 - r1) // g * pow(m1 // g, -1, m2 // g) % (m2 // g)
+    return (r1 + m1 * k) % math.lcm(m1, m2)
+
+
+@attrs.frozen(slots=False)
+class Ghost:
+    """The steps at which a ghost stands on an end node.
+
+    Hits before cycle_start happen once; hits in cycle_hits repeat every period.
+    """
+
+    tail_hits: list[int]
+    cycle_hits: list[int]
+    cycle_start: int
+    period: int
+
+    @cached_property
+    def _tail_set(self) -> set[int]:
+        return set(self.tail_hits)
+
+    @cached_property
+    def _cycle_offsets(self) -> set[int]:
+        return {t - self.cycle_start for t in self.cycle_hits}
+
+    def hits(self, step: int) -> bool:
+        if step < self.cycle_start:
+            return step in self._tail_set
+        return (step - self.cycle_start) % self.period in self._cycle_offsets
+
+
+def first_common_hit(ghosts: list[Ghost]) -> int | None:
+    # Until every ghost has entered its cycle, just try the first ghost's hits.
+    horizon = max(g.cycle_start for g in ghosts)
+    first = ghosts[0]
+    early_hits = [*first.tail_hits]
+    for hit in first.cycle_hits:
+        early_hits.extend(range(hit, horizon, first.period))
+    for step in sorted(early_hits):
+        if all(g.hits(step) for g in ghosts[1:]):
             return step
-        node = lookup[(node, direction)]
+
+    # From there on every ghost is periodic, so combine their residues with CRT.
+    residues = {0}
+    modulus = 1
+    for g in ghosts:
+        residues = {
+            r
+            for r1 in residues
+            for hit in g.cycle_hits
+            if (r := crt(r1, modulus, hit % g.period, g.period)) is not None
+        }
+        modulus = math.lcm(modulus, g.period)
+    if not residues:
+        return None
+    return min(r + max(0, -(-(horizon - r) // modulus)) * modulus for r in residues)
+
+
+@attrs.frozen
+class Network:
+    node_ids: dict[str, int]
+    # Node reached after following every direction once, by starting node.
+    jump: np.ndarray
+    # Steps into a pass at which an end node is reached, by starting node.
+    end_offsets: list[list[int]]
+    pass_length: int
+
+    @classmethod
+    def compile(
+        cls, directions: str, edges: dict[str, tuple[str, str]], end_suffix: str
+    ) -> Network:
+        node_ids = {node: i for i, node in enumerate(edges)}
+        left = np.array([node_ids[lt] for lt, _ in edges.values()], dtype=np.int64)
+        right = np.array([node_ids[rt] for _, rt in edges.values()], dtype=np.int64)
+        is_end = np.array([node.endswith(end_suffix) for node in edges])
+
+        end_offsets = [[] for _ in edges]
+        cur = np.arange(len(edges))
+        for offset, direction in enumerate(directions):
+            for start in np.nonzero(is_end[cur])[0].tolist():
+                end_offsets[start].append(offset)
+            cur = left[cur] if direction == "L" else right[cur]
+        return cls(node_ids, cur, end_offsets, len(directions))
+
+    def ghost(self, start: str) -> Ghost:
+        node = self.node_ids[start]
+        visited: dict[int, int] = {}
+        while node not in visited:
+            visited[node] = len(visited)
+            node = self.jump[node].item()
+        tail_passes = visited[node]
+
+        tail_hits = []
+        cycle_hits = []
+        for pass_num, pass_start in enumerate(visited):
+            hits = tail_hits if pass_num < tail_passes else cycle_hits
+            for offset in self.end_offsets[pass_start]:
+                hits.append(pass_num * self.pass_length + offset)
+        return Ghost(
+            tail_hits,
+            cycle_hits,
+            cycle_start=tail_passes * self.pass_length,
+            period=(len(visited) - tail_passes) * self.pass_length,
+        )
 
 
 def main():
@@ -21,18 +128,15 @@ def main():
     )
     directions = direction_lines[0].strip()
 
-    lookup = {}
-    starts = []
+    edges = {}
     for line in lookup_lines:
         start, left, right = re.findall(r"\b\w+\b", line)
-        if start.endswith("A"):
-            starts.append(start)
-        lookup[(start, "L")] = left
-        lookup[(start, "R")] = right
-
-    print(f'Part 1: {path_length("AAA", directions, lookup)}')
-    ans_2 = math.lcm(*[path_length(start, directions, lookup) for start in starts])
-    print(f"Part 2: {ans_2}")
+        edges[start] = (left, right)
+    network = Network.compile(directions, edges, end_suffix="Z")
+
+    print(f"Part 1: {first_common_hit([network.ghost('AAA')])}")
+    ghosts = [network.ghost(node) for node in edges if node.endswith("A")]
+    print(f"Part 2: {first_common_hit(ghosts)}")
 
 
 if __name__ == "__main__":
@@ -1,26 +1,64 @@
 from __future__ import annotations
 
-import itertools
+import math
 import sys
+from collections import defaultdict
+
+import numpy as np
+
+
+def lagrange_weights(n: int, position: int) -> list[int]:
+    """Weights w such that sum(w[i] * history[i]) is the history's value at position.
+
+    The difference pyramid extrapolates with the unique polynomial of degree
+    below n through the n known values, so this is its Lagrange basis evaluated
+    at position. Position n is the next value and -1 the one before the first.
+    """
+    weights = []
+    for i in range(n):
+        numerator = math.prod(position - j for j in range(n) if j != i)
+        denominator = math.factorial(i) * math.factorial(n - 1 - i)
+        sign = -1 if (n - 1 - i) % 2 else 1
+        weights.append(sign * numerator // denominator)
+    return weights
+
+
+def extrapolate(histories: np.ndarray, positions: list[int]) -> np.ndarray:
+    """Values at each position for every row of histories, as one matrix product"""
+    weights = [lagrange_weights(histories.shape[1], p) for p in positions]
+    # Not np.abs, which wraps around for the smallest int64.
+    max_value = max(-int(histories.min(initial=0)), int(histories.max(initial=0)))
+    max_weight_sum = max((sum(map(abs, w)) for w in weights), default=0)
+    if max_value * max_weight_sum < 2**63:
+        return histories @ np.array(weights, dtype=np.int64).T
+    # Too big for int64, so fall back to exact Python ints.
+    return histories.astype(object) @ np.array(weights, dtype=object).T
+
+
+def history_matrix(histories: list[list[int]]) -> np.ndarray:
+    """histories as int64, or as Python ints when some value doesn't fit"""
+    try:
+        return np.array(histories, dtype=np.int64)
+    except OverflowError:
+        return np.array(histories, dtype=object)
 
 
 def main():
-    histories = [[int(x) for x in line.split()] for line in sys.stdin]
-    forward_extrapolations = []
-    backward_extrapolations = []
-    for history in histories:
-        sequences = [history]
-        while not all(x == 0 for x in sequences[-1]):
-            sequences.append([b - a for a, b in itertools.pairwise(sequences[-1])])
-        forward_extrapolations.append(sum(sequence[-1] for sequence in sequences))
-
-        backward = 0
-        for sequence in reversed(sequences[:-1]):
-            backward = sequence[0] - backward
-        backward_extrapolations.append(backward)
-
-    print(f"Part 1: {sum(forward_extrapolations)}")
-    print(f"Part 2: {sum(backward_extrapolations)}")
+    by_length = defaultdict(list)
+    for line in sys.stdin:
+        history = [int(x) for x in line.split()]
+        if history:
+            by_length[len(history)].append(history)
+
+    forward = 0
+    backward = 0
+    for n, histories in by_length.items():
+        values = extrapolate(history_matrix(histories), [n, -1])
+        forward += sum(values[:, 0].tolist())
+        backward += sum(values[:, 1].tolist())
+
+    print(f"Part 1: {forward}")
+    print(f"Part 2: {backward}")
 
 
 if __name__ == "__main__":
@@ -1,102 +1,109 @@
 from __future__ import annotations
 
+import itertools
 import sys
-from collections import deque
-from collections.abc import Iterable
-from enum import Enum
 
 import attrs
 
+NORTH = (-1, 0)
+SOUTH = (1, 0)
+EAST = (0, 1)
+WEST = (0, -1)
 
-class Direction(Enum):
-    North = "North"
-    South = "South"
-    East = "East"
-    West = "West"
+PIPES: dict[int, tuple[tuple[int, int], tuple[int, int]]] = {
+    ord("|"): (NORTH, SOUTH),
+    ord("-"): (EAST, WEST),
+    ord("L"): (NORTH, EAST),
+    ord("J"): (NORTH, WEST),
+    ord("7"): (SOUTH, WEST),
+    ord("F"): (SOUTH, EAST),
+}
 
-    def apply(self, pos: tuple[int, int]) -> tuple[int, int]:
-        r, c = pos
-        dr = 1 if self is self.South else -1 if self is self.North else 0
-        dc = 1 if self is self.East else -1 if self is self.West else 0
-        return (r + dr, c + dc)
 
-    def connects(self, elem: str) -> bool:
-        mapping = {
-            self.North: "LJ|",
-            self.South: "7F|",
-            self.West: "J7-",
-            self.East: "LF-",
-        }
-        return elem == "S" or elem in mapping[self]
+@attrs.frozen
+class Loop:
+    vertices: list[tuple[int, int]]
+    length: int
 
     @property
-    def opposite(self) -> Direction:
-        return {
-            self.South: self.North,
-            self.North: self.South,
-            self.West: self.East,
-            self.East: self.West,
-        }[self]
+    def enclosed(self) -> int:
+        """Tiles strictly inside the loop"""
+        # Shoelace gives the area, and Pick's theorem (A = i + b/2 - 1) turns it
+        # into interior points given the b = length points on the boundary.
+        twice_area = abs(
+            sum(
+                r1 * c2 - r2 * c1
+                for (r1, c1), (r2, c2) in itertools.pairwise(
+                    [*self.vertices, self.vertices[0]]
+                )
+            )
+        )
+        return (twice_area - self.length + 2) // 2
 
 
 @attrs.frozen
 class Grid:
-    grid: list[str]
-
-    @property
-    def start_location(self) -> tuple[int, int]:
-        for r, row in enumerate(self.grid):
-            for c, elem in enumerate(row):
-                if elem == "S":
-                    return (r, c)
-        raise AssertionError
-
-    def neighbors(self, pos: tuple[int, int]) -> Iterable[tuple[int, int]]:
-        r, c = pos
-        for direction in Direction:
-            if not direction.connects(self.grid[r][c]):
-                continue
-            r2, c2 = direction.apply(pos)
-            if not (0 <= r2 < len(self.grid) and 0 <= c2 < len(self.grid[r])):
+    """The raw input bytes, with each row stride bytes apart"""
+
+    data: bytes
+    stride: int
+
+    @classmethod
+    def parse(cls, data: bytes) -> Grid:
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        return cls(data, data.index(b"\n") + 1)
+
+    def offset(self, direction: tuple[int, int]) -> int:
+        dr, dc = direction
+        return dr * self.stride + dc
+
+    def connections(self, pos: int) -> list[tuple[int, int]]:
+        """Directions from pos whose neighboring pipe leads back to pos"""
+        res = []
+        for direction in (NORTH, SOUTH, EAST, WEST):
+            neighbor = pos + self.offset(direction)
+            if not 0 <= neighbor < len(self.data):
                 continue
-            if direction.opposite.connects(self.grid[r2][c2]):
-                yield (r2, c2)
-
-    def get_distances(self) -> list[list[int]]:
-        dist = [[-1] * len(row) for row in self.grid]
-        start = self.start_location
-        start_r, start_c = start
-        dist[start_r][start_c] = 0
-
-        queue = deque([start])
-        while queue:
-            r, c = queue.popleft()
-            for nr, nc in self.neighbors((r, c)):
-                if dist[nr][nc] == -1:
-                    dist[nr][nc] = dist[r][c] + 1
-                    queue.append((nr, nc))
-
-        return dist
+            back = (-direction[0], -direction[1])
+            if back in PIPES.get(self.data[neighbor], ()):
+                res.append(direction)
+        return res
+
+    def trace_loop(self) -> Loop:
+        # Maps (pipe, offset we arrived by) to the offset we leave by.
+        turns: dict[tuple[int, int], int] = {}
+        for pipe, (a, b) in PIPES.items():
+            turns[(pipe, -self.offset(a))] = self.offset(b)
+            turns[(pipe, -self.offset(b))] = self.offset(a)
+
+        start = self.data.index(b"S")
+        # A pipe pointing at S may be a stray, so follow each until one returns.
+        for direction in self.connections(start):
+            move = self.offset(direction)
+            vertices = [divmod(start, self.stride)]
+            pos = start + move
+            length = 1
+            while pos != start:
+                next_move = turns.get((self.data[pos], move))
+                if next_move is None:
+                    break
+                if next_move != move:
+                    vertices.append(divmod(pos, self.stride))
+                move = next_move
+                pos += move
+                length += 1
+                if not 0 <= pos < len(self.data):
+                    break
+            else:
+                return Loop(vertices, length)
+        raise ValueError("no loop through S")
 
 
 def main():
-    grid = Grid([line.strip() for line in sys.stdin])
-    distances = grid.get_distances()
-    print(f"Part 1: {max(max(row) for row in distances)}")
-
-    just_loop = []
-    for i, dists in enumerate(distances):
-        just_loop.append(["." if d == -1 else c for c, d in zip(grid.grid[i], dists)])
-
-    for row in just_loop:
-        intersections = 0
-        for i, c in enumerate(row):
-            if c == "." and intersections % 2 == 1:
-                row[i] = "I"
-            elif c in "J|L":
-                intersections += 1
-
-    print(f"Part 2: {sum(row.count('I') for row in just_loop)}")
+    loop = Grid.parse(sys.stdin.buffer.read()).trace_loop()
+    print(f"Part 1: {loop.length // 2}")
+    print(f"Part 2: {loop.enclosed}")
 
 
 if __name__ == "__main__":
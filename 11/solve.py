@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import bisect
 import sys
 from functools import cached_property
-from itertools import combinations
 
 import attrs
 
@@ -32,26 +32,39 @@ class Grid:
         all_cols = set(range(len(self.grid[0])))
         return sorted(all_cols - galaxy_cols)
 
-    def distances(self, expansion_mult: int = 1) -> list[int]:
-        def _distance_along_dim(x1: int, x2: int, xs: list[int]):
-            if x1 > x2:
-                x1, x2 = x2, x1
-            n_expanded = len([x for x in xs if x1 < x < x2])
-            return x2 - x1 + n_expanded * (expansion_mult - 1)
+    def distance_sums(self, expansion_mults: list[int]) -> list[int]:
+        """Sum of distances between all pairs of galaxies, per expansion multiplier"""
+        # Each expanded line crossed adds (mult - 1), so the sum is linear in mult.
+        row_base, row_crossed = _axis_sums(
+            [r for r, _ in self.galaxies], self.expanded_rows
+        )
+        col_base, col_crossed = _axis_sums(
+            [c for _, c in self.galaxies], self.expanded_cols
+        )
+        base = row_base + col_base
+        crossed = row_crossed + col_crossed
+        return [base + crossed * (mult - 1) for mult in expansion_mults]
 
-        dists = []
-        for (r1, c1), (r2, c2) in combinations(self.galaxies, 2):
-            row_dist = _distance_along_dim(r1, r2, self.expanded_rows)
-            col_dist = _distance_along_dim(c1, c2, self.expanded_cols)
-            dists.append(row_dist + col_dist)
 
-        return dists
+def _axis_sums(coords: list[int], expanded: list[int]) -> tuple[int, int]:
+    """Sums of pairwise gaps along one axis: (unexpanded, expanded lines crossed)"""
+    coords = sorted(coords)
+    n_expanded_before = [bisect.bisect_left(expanded, x) for x in coords]
+    return _sum_pairwise_diffs(coords), _sum_pairwise_diffs(n_expanded_before)
+
+
+def _sum_pairwise_diffs(sorted_xs: list[int]) -> int:
+    # The k-th smallest of n values is subtracted by the n - 1 - k values above
+    # it and subtracts the k values below it.
+    n = len(sorted_xs)
+    return sum(x * (2 * k - n + 1) for k, x in enumerate(sorted_xs))
 
 
 def main():
     grid = Grid([line.strip() for line in sys.stdin])
-    print(f"Part 1: {sum(grid.distances(2))}")
-    print(f"Part 2: {sum(grid.distances(1000000))}")
+    p1_ans, p2_ans = grid.distance_sums([2, 1000000])
+    print(f"Part 1: {p1_ans}")
+    print(f"Part 2: {p2_ans}")
 
 
 if __name__ == "__main__":
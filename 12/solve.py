@@ -1,10 +1,70 @@
 from __future__ import annotations
 
+import itertools
+import math
+import os
+import re
 import sys
-from functools import cache
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable
+from multiprocessing.pool import Pool
 
 import attrs
 
+SUFFIX_CACHE_BYTES = 64 << 20
+# Rough per-entry overhead of a cache key, on top of its strings and ints.
+KEY_OVERHEAD_BYTES = 64
+GROUP_REGEX = re.compile(r"[#?]+")
+# Unfolded rows up to this many (position, run) cells are counted directly.
+# On 144 random rows of 8 to 60 cells unfolded 5 and 20 times, this cutoff took
+# 9% longer than always picking the faster engine; 1 << 14 took 34% and 1 << 18
+# 47% longer.
+MAX_EXPANDED_CELLS = 1 << 15
+# Work of one term of compose, in cells of count_ways: about 400ns (mod p) to
+# 900ns (exact) against 100-300ns per cell, on rows of one to three runs.
+COMPOSE_TERM_CELLS = 2
+
+# Maps a boundary state (r, q) to counts of the states (delta, q') it can reach.
+#
+# r is the index into the clue of the next run to close and q how far into that
+# run we are, with q == run meaning the run is complete but still needs its
+# trailing operational spring. delta is the number of runs closed minus
+# len(clue) per copy crossed, which keeps the map independent of how many
+# copies came before.
+Transfer = dict[tuple[int, int], dict[tuple[int, int], int]]
+
+
+def compose(
+    first: Transfer, second: Transfer, n_runs: int, mod: int | None
+) -> Transfer:
+    res: Transfer = {}
+    for (r, q), ends in first.items():
+        composed: defaultdict[tuple[int, int], int] = defaultdict(int)
+        for (delta, q1), count in ends.items():
+            for (delta2, q2), count2 in second[((r + delta) % n_runs, q1)].items():
+                composed[(delta + delta2, q2)] += count * count2
+        if mod is not None:
+            composed = {k: v % mod for k, v in composed.items()}
+        res[(r, q)] = dict(composed)
+    return res
+
+
+def compose_work(first: Transfer, second: Transfer, n_runs: int) -> int:
+    """Number of terms compose(first, second, ...) multiplies"""
+    return sum(
+        len(second[((r + delta) % n_runs, q1)])
+        for (r, _), ends in first.items()
+        for delta, q1 in ends
+    )
+
+
+def prune(transfer: Transfer, low: int, high: int) -> Transfer:
+    """Drops offsets that the remaining copies could not bring back to zero"""
+    return {
+        start: {(d, q): c for (d, q), c in ends.items() if low <= d <= high and c}
+        for start, ends in transfer.items()
+    }
+
 
 @attrs.frozen
 class Arrangement:
@@ -17,45 +77,322 @@ class Arrangement:
         clue = [int(x) for x in clue_str.split(",")]
         return cls(conditions=conditions, clue=clue)
 
-    def maybe_damaged(self, i: int) -> bool:
-        return self.conditions[i] in "?#"
+    def count_ways(self) -> int:
+        # Pad with an operational spring so that every run is followed by one.
+        conditions = self.conditions + "."
+        n = len(conditions)
+        # n_dots[i] is the number of "." in conditions[:i], so a run of length L
+        # fits at i exactly when n_dots[i + L] == n_dots[i].
+        n_dots = [0, *itertools.accumulate(c == "." for c in conditions)]
+
+        # ways[i]: ways to place the runs so far in conditions[:i], where
+        # conditions[:i] ends with the operational spring after the last run.
+        first_damaged = conditions.find("#") if "#" in conditions else n
+        ways = [int(i <= first_damaged) for i in range(n + 1)]
 
-    def maybe_undamaged(self, i: int) -> bool:
-        return self.conditions[i] in "?."
+        # Each run plus its trailing spring needs run + 1 cells, which bounds where
+        # the j-th run can end given the runs on either side of it.
+        min_end = 0
+        max_end = n - sum(run + 1 for run in self.clue)
+        for run in self.clue:
+            min_end += run + 1
+            max_end += run + 1
+            next_ways = [0] * (n + 1)
+            for i in range(min_end, max_end + 1):
+                if conditions[i - 1] == "#":
+                    continue
+                # conditions[i - 1] is operational, so either it ends a run...
+                start = i - run - 1
+                if n_dots[start + run] == n_dots[start]:
+                    next_ways[i] += ways[start]
+                # ...or it is an extra operational spring after one.
+                next_ways[i] += next_ways[i - 1]
+            ways = next_ways
+        return ways[n]
 
-    def count_ways(self) -> int:
-        @cache
-        def ways(i: int, j: int, cons: int) -> int:
-            if i == len(self.conditions):
-                if j == len(self.clue):
-                    return 1
-                if j == len(self.clue) - 1 and cons == self.clue[j]:
-                    return 1
-                return 0
+    def transfer(self, joiner: str) -> Transfer:
+        """How one copy of the conditions followed by joiner moves boundary states"""
+        n_runs = len(self.clue)
+        res: Transfer = {}
+        for r, run in enumerate(self.clue):
+            for q in range(run + 1):
+                states = {(0, q): 1}
+                for c in self.conditions + joiner:
+                    next_states: defaultdict[tuple[int, int], int] = defaultdict(int)
+                    for (closed, progress), count in states.items():
+                        length = self.clue[(r + closed) % n_runs]
+                        if c in ".?":
+                            if progress == 0:
+                                next_states[(closed, 0)] += count
+                            elif progress == length:
+                                next_states[(closed + 1, 0)] += count
+                        if c in "#?" and progress < length:
+                            next_states[(closed, progress + 1)] += count
+                    states = next_states
+                res[(r, q)] = {
+                    (closed - n_runs, progress): count
+                    for (closed, progress), count in states.items()
+                }
+        return res
+
+    def unfold(self, copies: int) -> Arrangement:
+        return Arrangement("?".join([self.conditions] * copies), self.clue * copies)
+
+    def expanded_cells(self, copies: int) -> int:
+        """(position, run) cells of count_ways on the unfolded row"""
+        return (len(self.conditions) + 1) * len(self.clue) * copies**2
+
+    def count_unfolded(self, copies: int, mod: int | None = None) -> int:
+        """count_ways for the conditions and clue repeated, joined by "?".
+
+        When a copy can never hold more runs than one clue (the usual case), the
+        per-copy transfer is raised to the power copies by repeated squaring, so
+        the cost is logarithmic in copies. Small unfolded rows are counted by
+        count_ways on the unfolded row instead, which is faster for them.
+
+        When a copy can hold more runs than one clue, the run offset is bounded
+        only by the copies left, so there is one state per offset and no engine
+        can make the cost independent of copies: both grow about quadratically.
+        Squaring still wins when pruning leaves few offsets reachable, so it is
+        tried first and abandoned for count_ways once it has done as much work
+        as count_ways would.
+        """
+        if self.expanded_cells(copies) <= MAX_EXPANDED_CELLS:
+            return self._count_expanded(copies, mod)
+        join = self.transfer("?")
+        # The end of the last copy closes its final run like an operational spring.
+        end = self.transfer(".")
+        deltas = [d for t in (join, end) for ends in t.values() for d, _ in ends]
+        max_gain = max([0, *deltas])
+        max_loss = -min([0, *deltas])
+        n_runs = len(self.clue)
+        budget = math.inf
+        if max_gain > 0:
+            budget = self.expanded_cells(copies) / COMPOSE_TERM_CELLS
+        work = 0
+
+        def product(first: Transfer, second: Transfer) -> Transfer | None:
+            nonlocal work
+            work += compose_work(first, second, n_runs)
+            if work > budget:
+                return None
+            return compose(first, second, n_runs, mod)
+
+        def bounded(transfer: Transfer, copies_covered: int) -> Transfer:
+            remaining = copies - copies_covered
+            return prune(transfer, -remaining * max_gain, remaining * max_loss)
+
+        res: Transfer | None = None
+        covered = 0
+        power = bounded(join, 1)
+        power_size = 1
+        exponent = copies - 1
+        while exponent:
+            if exponent & 1:
+                res = power if res is None else product(res, power)
+                if res is None:
+                    return self._count_expanded(copies, mod)
+                covered += power_size
+                res = bounded(res, covered)
+            exponent >>= 1
+            if exponent:
+                power = product(power, power)
+                if power is None:
+                    return self._count_expanded(copies, mod)
+                power_size *= 2
+                power = bounded(power, power_size)
+        res = end if res is None else product(res, end)
+        if res is None:
+            return self._count_expanded(copies, mod)
+        return res[(0, 0)].get((0, 0), 0)
+
+    def _count_expanded(self, copies: int, mod: int | None) -> int:
+        res = self.unfold(copies).count_ways()
+        return res if mod is None else res % mod
+
+
+@attrs.define
+class BoundedCache:
+    """Least recently used ints, evicted once their keys hold max_bytes"""
+
+    max_bytes: int
+    _entries: OrderedDict[Hashable, tuple[int, int]] = attrs.field(
+        factory=OrderedDict, init=False
+    )
+    _n_bytes: int = attrs.field(default=0, init=False)
+
+    def get(self, key: Hashable) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: int, n_bytes: int) -> None:
+        self._entries[key] = (value, n_bytes)
+        self._n_bytes += n_bytes
+        while self._n_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._n_bytes -= evicted
+
+
+# Lives for the whole worker process, so rows share their work.
+_suffix_cache = BoundedCache(SUFFIX_CACHE_BYTES)
+
+
+def count_group_ways(group: str, runs: tuple[int, ...]) -> int:
+    """Arrangement.count_ways for runs all placed in one group of "#" and "?".
+
+    A group on its own is also a suffix, so it shares the suffix cache.
+    """
+    if "#" not in group:
+        # Choose where the runs go among the cells they don't fill.
+        free = len(group) - sum(runs) - len(runs) + 1
+        return math.comb(free + len(runs), len(runs)) if free >= 0 else 0
+    res = _suffix_cache.get((group, runs))
+    if res is None:
+        res = Arrangement(group, list(runs)).count_ways()
+        n_bytes = len(group) + 8 * len(runs) + KEY_OVERHEAD_BYTES
+        _suffix_cache.put((group, runs), res, n_bytes)
+    return res
+
+
+def count_suffix_ways(conditions: str, clue: tuple[int, ...]) -> int:
+    """Same as Arrangement.count_ways, memoized on (conditions, clue) suffixes.
+
+    The conditions are split into groups of "#" and "?" between "."s, and a
+    suffix is the groups from some index on, joined by single "."s. A forward
+    pass finds the states (group, runs placed) reachable from the start,
+    stopping at suffixes already cached, and a backward pass fills in the rest,
+    so nothing recurses.
+    """
+    groups = GROUP_REGEX.findall(conditions)
+    n_groups, n_runs = len(groups), len(clue)
+    # Over groups[g:]: the cells, the most runs that fit and the fewest needed.
+    group_cells = [0] * (n_groups + 1)
+    most_runs = [0] * (n_groups + 1)
+    fewest_runs = [0] * (n_groups + 1)
+    suffixes = [""] * (n_groups + 1)
+    for g in reversed(range(n_groups)):
+        group_cells[g] = group_cells[g + 1] + len(groups[g])
+        most_runs[g] = most_runs[g + 1] + (len(groups[g]) + 1) // 2
+        fewest_runs[g] = fewest_runs[g + 1] + ("#" in groups[g])
+        rest = suffixes[g + 1]
+        suffixes[g] = f"{groups[g]}.{rest}" if rest else groups[g]
+    run_cells = [0] * (n_runs + 1)
+    for j in reversed(range(n_runs)):
+        run_cells[j] = run_cells[j + 1] + clue[j]
+
+    # ways[g][j]: ways to place clue[j:] in groups[g:], and fits[g][j] how many
+    # of those runs can go in groups[g].
+    ways: list[dict[int, int]] = [{} for _ in range(n_groups)] + [{n_runs: 1}]
+    fits: list[dict[int, range]] = [{} for _ in range(n_groups)]
+    reached: list[set[int]] = [set() for _ in range(n_groups + 1)]
+    reached[0].add(0)
+    for g, group in enumerate(groups):
+        for j in reached[g]:
+            cached = _suffix_cache.get((suffixes[g], clue[j:]))
+            if cached is not None:
+                ways[g][j] = cached
+                continue
+            most = 0
+            cells = -1
+            while j + most < n_runs and cells + clue[j + most] + 1 <= len(group):
+                cells += clue[j + most] + 1
+                most += 1
+            fits[g][j] = range(int("#" in group), most + 1)
+            for k in fits[g][j]:
+                left = n_runs - j - k
+                if (
+                    fewest_runs[g + 1] <= left <= most_runs[g + 1]
+                    and run_cells[j + k] <= group_cells[g + 1]
+                ):
+                    reached[g + 1].add(j + k)
+
+    for g in reversed(range(n_groups)):
+        for j, fit in fits[g].items():
             res = 0
-            if self.maybe_damaged(i) and j < len(self.clue) and cons < self.clue[j]:
-                # Extend current clue.
-                res += ways(i + 1, j, cons + 1)
-            if self.maybe_undamaged(i):
-                if cons == 0:
-                    # Delay applying current clue.
-                    res += ways(i + 1, j, 0)
-                elif j < len(self.clue) and cons == self.clue[j]:
-                    # Move on to next clue.
-                    res += ways(i + 1, j + 1, 0)
-            return res
+            for k in fit:
+                rest = ways[g + 1].get(j + k, 0)
+                if rest:
+                    res += count_group_ways(groups[g], clue[j : j + k]) * rest
+            ways[g][j] = res
+            n_bytes = len(suffixes[g]) + 8 * (n_runs - j) + KEY_OVERHEAD_BYTES
+            _suffix_cache.put((suffixes[g], clue[j:]), res, n_bytes)
+    return ways[0].get(0, 0)
+
 
-        return ways(0, 0, 0)
+def count_row_ways(
+    arrangement: Arrangement, copies: int, mod: int | None = None
+) -> int:
+    """count_ways for the arrangement unfolded copies times, modulo mod if given.
+
+    Unfolded rows small enough to count directly go through count_suffix_ways,
+    so that they share cached suffixes, and the rest through count_unfolded.
+    """
+    if copies == 1 or arrangement.expanded_cells(copies) <= MAX_EXPANDED_CELLS:
+        unfolded = arrangement.unfold(copies)
+        res = count_suffix_ways(unfolded.conditions, tuple(unfolded.clue))
+        return res if mod is None else res % mod
+    return arrangement.count_unfolded(copies, mod)
+
+
+def _count_chunk(
+    chunk: list[Arrangement], copies: int, mod: int | None
+) -> list[int]:
+    return [count_row_ways(a, copies, mod) for a in chunk]
+
+
+def n_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def count_ways_batch(
+    arrangements: list[Arrangement],
+    copies: int = 1,
+    pool: Pool | None = None,
+    chunks_per_process: int = 4,
+    mod: int | None = None,
+) -> list[int]:
+    """count_ways for each arrangement unfolded copies times, on a process pool.
+
+    Counts are reduced modulo mod if given, which keeps them small for large
+    copies.
+
+    Identical rows are only sent to the workers once. Passing the same pool to
+    several calls keeps the workers, and their caches, between them.
+    """
+    if pool is None:
+        with Pool(n_workers()) as pool:
+            return count_ways_batch(
+                arrangements, copies, pool, chunks_per_process, mod
+            )
+
+    rows = dict.fromkeys((a.conditions, tuple(a.clue)) for a in arrangements)
+    unique = [Arrangement(conditions, list(clue)) for conditions, clue in rows]
+    n_chunks = min(len(unique), n_workers() * chunks_per_process) or 1
+    # Deal the longest rows out first so every chunk gets a similar mix.
+    unique.sort(key=lambda a: -len(a.conditions))
+    chunks = [unique[k::n_chunks] for k in range(n_chunks)]
+    chunk_results = pool.starmap(
+        _count_chunk, [(chunk, copies, mod) for chunk in chunks]
+    )
+
+    counts = {
+        (a.conditions, tuple(a.clue)): count
+        for chunk, chunk_counts in zip(chunks, chunk_results)
+        for a, count in zip(chunk, chunk_counts)
+    }
+    return [counts[(a.conditions, tuple(a.clue))] for a in arrangements]
 
 
 def main():
     arrangements = [Arrangement.parse(line) for line in sys.stdin]
-    print(f"Part 1: {sum(a.count_ways() for a in arrangements)}")
-
-    unfolded_arrangements = [
-        Arrangement("?".join([a.conditions] * 5), a.clue * 5) for a in arrangements
-    ]
-    print(f"Part 2: {sum(a.count_ways() for a in unfolded_arrangements)}")
+    with Pool(n_workers()) as pool:
+        part1 = sum(count_ways_batch(arrangements, pool=pool))
+        part2 = sum(count_ways_batch(arrangements, copies=5, pool=pool))
+    print(f"Part 1: {part1}")
+    print(f"Part 2: {part2}")
 
 
 if __name__ == "__main__":
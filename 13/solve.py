@@ -6,43 +6,51 @@ from functools import cached_property
 
 import attrs
 
+TO_BINARY = str.maketrans("#.", "10")
+
+
+def encode(lines: list[str]) -> list[int]:
+    return [int(line.translate(TO_BINARY), 2) for line in lines]
+
+
+def reflections(lines: list[int], max_smudges: int = 1) -> list[list[int]]:
+    """Pivots where the mirrored lines differ in exactly k cells, for each k.
+
+    Each pivot is scanned once, stopping as soon as it differs in more than
+    max_smudges cells.
+    """
+    pivots: list[list[int]] = [[] for _ in range(max_smudges + 1)]
+    for pivot in range(1, len(lines)):
+        diff = 0
+        for i, j in zip(reversed(range(pivot)), range(pivot, len(lines))):
+            diff += (lines[i] ^ lines[j]).bit_count()
+            if diff > max_smudges:
+                break
+        else:
+            pivots[diff].append(pivot)
+    return pivots
+
 
 @attrs.define(slots=False)
 class Pattern:
     grid: list[str]
 
     @cached_property
-    def transpose(self) -> Pattern:
-        return Pattern(["".join(tup) for tup in zip(*self.grid)])
-
-    @cached_property
-    def reflections(self) -> list[int]:
-        """Finds perfect reflection points"""
-        pivots = []
-        for pivot in range(1, len(self.grid)):
-            to_start = reversed(range(pivot))
-            to_end = range(pivot, len(self.grid))
-            if all(self.grid[i] == self.grid[j] for i, j in zip(to_start, to_end)):
-                pivots.append(pivot)
-        return pivots
+    def rows(self) -> list[int]:
+        return encode(self.grid)
 
     @cached_property
-    def smudges(self) -> list[Pattern]:
-        """All smudges that could potentially change the reflection"""
-        row_set = set(self.grid)
-        smudges = []
-        for r, row in enumerate(self.grid):
-            for c in range(len(row)):
-                smudged = row[:c] + ("." if row[c] == "#" else "#") + row[c + 1 :]
-                if smudged in row_set:
-                    smudges.append(
-                        Pattern(self.grid[:r] + [smudged] + self.grid[r + 1 :])
-                    )
-        return smudges
+    def cols(self) -> list[int]:
+        return encode(["".join(tup) for tup in zip(*self.grid)])
 
-    @cached_property
-    def reflection_id(self) -> int:
-        return sum(self.reflections) * 100 + sum(self.transpose.reflections)
+    def reflection_ids(self, max_smudges: int = 1) -> list[int]:
+        """Summaries of the reflections with 0 up to max_smudges smudges"""
+        return [
+            sum(row_pivots) * 100 + sum(col_pivots)
+            for row_pivots, col_pivots in zip(
+                reflections(self.rows, max_smudges), reflections(self.cols, max_smudges)
+            )
+        ]
 
     def __str__(self) -> str:
         return "\n".join(self.grid)
@@ -54,22 +62,13 @@ def main():
         Pattern(list(group)) for key, group in itertools.groupby(lines, bool) if key
     ]
 
-    p1_ans = 0
-    p2_ans = 0
+    totals = [0, 0]
     for pattern in patterns:
-        p1_ans += pattern.reflection_id
-        smudges = [*pattern.smudges, *(s.transpose for s in pattern.transpose.smudges)]
-        for smudge in smudges:
-            if smudge.reflection_id and smudge.reflection_id != pattern.reflection_id:
-                p2_ans += smudge.reflection_id
-                if len(smudge.reflections) + len(smudge.transpose.reflections) > 1:
-                    p2_ans -= pattern.reflection_id
-                break
-        else:
-            raise AssertionError
+        for smudges, reflection_id in enumerate(pattern.reflection_ids()):
+            totals[smudges] += reflection_id
 
-    print(f"Part 1: {p1_ans}")
-    print(f"Part 2: {p2_ans}")
+    print(f"Part 1: {totals[0]}")
+    print(f"Part 2: {totals[1]}")
 
 
 if __name__ == "__main__":
@@ -1,73 +1,100 @@
 from __future__ import annotations
 
+import hashlib
 import itertools
 import sys
 
 import attrs
-
-
-def _slide_row(row: str, reverse: bool) -> str:
-    groups = itertools.groupby(row, lambda c: c == "#")
-    return "".join("".join(sorted(group, reverse=reverse)) for _, group in groups)
+import numpy as np
 
 
 @attrs.frozen
-class Grid:
-    grid: list[str]
-
-    def transpose(self) -> Grid:
-        return Grid(["".join(tup) for tup in zip(*self.grid)])
-
-    def slide_left(self) -> Grid:
-        return Grid([_slide_row(row, reverse=True) for row in self.grid])
-
-    def slide_right(self) -> Grid:
-        return Grid([_slide_row(row, reverse=False) for row in self.grid])
-
-    def slide_up(self) -> Grid:
-        return self.transpose().slide_left().transpose()
+class Tilt:
+    """Precomputed segments between cube rocks for one tilt direction.
+
+    Each open cell gets the id of its segment and its distance from the end of
+    the segment that rocks roll towards.
+    """
+
+    segment: np.ndarray
+    rank: np.ndarray
+    n_segments: int
+
+    @classmethod
+    def north(cls, cubes: np.ndarray) -> Tilt:
+        n_rows, n_cols = cubes.shape
+        row = np.arange(n_rows)[:, np.newaxis]
+        # Each cube starts a new segment in its column, beginning just below it.
+        segment = np.cumsum(cubes, axis=0) + np.arange(n_cols) * (n_rows + 1)
+        start = np.maximum.accumulate(np.where(cubes, row + 1, 0), axis=0)
+        return cls(segment, row - start, n_cols * (n_rows + 1))
+
+    @classmethod
+    def build(cls, cubes: np.ndarray, direction: str) -> Tilt:
+        # Reorient so the direction is north, then map the tables back.
+        orient = {
+            "N": lambda a: a,
+            "W": lambda a: a.T,
+            "S": lambda a: a[::-1],
+            "E": lambda a: a.T[::-1],
+        }[direction]
+        unorient = {"E": lambda a: a[::-1].T}.get(direction, orient)
+        tilt = cls.north(orient(cubes))
+        return cls(unorient(tilt.segment), unorient(tilt.rank), tilt.n_segments)
+
+    def apply(self, rocks: np.ndarray, cubes: np.ndarray) -> np.ndarray:
+        counts = np.bincount(self.segment[rocks], minlength=self.n_segments)
+        return (self.rank < counts[self.segment]) & ~cubes
 
-    def slide_down(self) -> Grid:
-        return self.transpose().slide_right().transpose()
 
-    def spin_cycle(self) -> Grid:
-        return self.slide_up().slide_left().slide_down().slide_right()
-
-    @property
-    def load(self) -> int:
-        return sum(
-            (i + 1) * row.count("O") for i, row in enumerate(reversed(self.grid))
-        )
-
-    def cycle_length(self) -> tuple[int, int]:
-        """Return tuple of (cycle length, cycle start)"""
-        spin = self
-        first_seen = {}
+@attrs.frozen
+class Dish:
+    cubes: np.ndarray
+    tilts: dict[str, Tilt]
+
+    @classmethod
+    def parse(cls, lines: list[str]) -> tuple[Dish, np.ndarray]:
+        """Returns the dish and its initial rounded rocks"""
+        grid = np.array([list(line) for line in lines])
+        cubes = grid == "#"
+        tilts = {d: Tilt.build(cubes, d) for d in "NWSE"}
+        return cls(cubes, tilts), grid == "O"
+
+    def tilt(self, rocks: np.ndarray, direction: str) -> np.ndarray:
+        return self.tilts[direction].apply(rocks, self.cubes)
+
+    def spin_cycle(self, rocks: np.ndarray) -> np.ndarray:
+        for direction in "NWSE":
+            rocks = self.tilt(rocks, direction)
+        return rocks
+
+    def load(self, rocks: np.ndarray) -> int:
+        weights = np.arange(rocks.shape[0], 0, -1)[:, np.newaxis]
+        return int((rocks * weights).sum())
+
+    def load_after(self, rocks: np.ndarray, n_cycles: int) -> int:
+        """Load after n_cycles spin cycles, found by detecting the state cycle"""
+        first_seen: dict[bytes, int] = {}
+        loads = []
         for iteration in itertools.count():
-            if str(spin) in first_seen:
-                cycle_length = iteration - first_seen[str(spin)]
-                return (cycle_length, first_seen[str(spin)])
-            first_seen[str(spin)] = iteration
-            spin = spin.spin_cycle()
+            if iteration == n_cycles:
+                return self.load(rocks)
+            digest = hashlib.blake2b(np.packbits(rocks), digest_size=16).digest()
+            if digest in first_seen:
+                cycle_start = first_seen[digest]
+                cycle_length = iteration - cycle_start
+                return loads[cycle_start + (n_cycles - cycle_start) % cycle_length]
+            first_seen[digest] = iteration
+            loads.append(self.load(rocks))
+            rocks = self.spin_cycle(rocks)
         raise AssertionError
 
-    def __str__(self) -> str:
-        return "\n".join(self.grid)
-
 
 def main():
-    grid = Grid([line.strip() for line in sys.stdin])
-
-    print(f"Part 1: {grid.slide_up().load}")
-
-    n_iterations = 1000000000
-    cycle_length, cycle_start = grid.cycle_length()
-    spin = grid
-    for _ in range(cycle_start):
-        spin = spin.spin_cycle()
-    for _ in range((n_iterations - cycle_start) % cycle_length):
-        spin = spin.spin_cycle()
-    print(f"Part 2: {spin.load}")
+    dish, rocks = Dish.parse([line.strip() for line in sys.stdin if line.strip()])
+
+    print(f"Part 1: {dish.load(dish.tilt(rocks, 'N'))}")
+    print(f"Part 2: {dish.load_after(rocks, 1000000000)}")
 
 
 if __name__ == "__main__":
@@ -1,38 +1,53 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import sys
+from collections.abc import Iterator
+from typing import BinaryIO
 
+CHUNK_SIZE = 1 << 20
 
-def hsh(s: str) -> int:
-    cur = 0
+# One HASH step is cur = (cur + c) * 17 % 256, so only (cur + c) % 256 matters.
+TIMES_17 = [x * 17 % 256 for x in range(256)]
+
+
+def hsh(s: bytes, cur: int = 0) -> int:
     for c in s:
-        cur += ord(c)
-        cur *= 17
-        cur %= 256
+        cur = TIMES_17[(cur + c) & 255]
     return cur
 
 
+def iter_steps(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yields non-empty comma-separated steps, holding at most one chunk in memory"""
+    tail = b""
+    while chunk := stream.read(chunk_size):
+        steps = (tail + chunk.translate(None, b"\r\n")).split(b",")
+        tail = steps.pop()
+        yield from filter(None, steps)
+    if tail:
+        yield tail
+
+
 def main():
-    instructions = input().strip().split(",")
-    print(f"Part 1: {sum(map(hsh, instructions))}")
-
-    boxes = defaultdict(list)
-    focals = {}
-    for step in instructions:
-        if step.endswith("-"):
-            label = step.removesuffix("-")
-            if label in boxes[hsh(label)]:
-                boxes[hsh(label)].remove(label)
+    total_hash = 0
+    # Dicts keep insertion order, so each box is label -> focal length in slot order.
+    boxes: list[dict[bytes, int]] = [{} for _ in range(256)]
+    for step in iter_steps(sys.stdin.buffer):
+        if step.endswith(b"-"):
+            label = step[:-1]
+            box = hsh(label)
+            total_hash += hsh(b"-", box)
+            boxes[box].pop(label, None)
         else:
-            label, focal = step.split("=")
-            focals[label] = int(focal)
-            if label not in boxes[hsh(label)]:
-                boxes[hsh(label)].append(label)
+            label, focal = step.split(b"=")
+            box = hsh(label)
+            total_hash += hsh(b"=" + focal, box)
+            boxes[box][label] = int(focal)
+    print(f"Part 1: {total_hash}")
 
     power = 0
-    for box_num, box in boxes.items():
-        for slot, label in enumerate(box):
-            power += (box_num + 1) * (slot + 1) * focals[label]
+    for box_num, box in enumerate(boxes):
+        for slot, focal in enumerate(box.values()):
+            power += (box_num + 1) * (slot + 1) * focal
     print(f"Part 2: {power}")
 
 
@@ -1,12 +1,10 @@
 from __future__ import annotations
 
 import enum
-import os
 import sys
-from multiprocessing import Pool
+from functools import cached_property
 
 import attrs
-from attr import evolve, field
 
 
 class Direction(enum.IntEnum):
@@ -15,113 +13,147 @@ class Direction(enum.IntEnum):
     Left = 2
     Down = 3
 
+    @property
+    def delta(self) -> tuple[int, int]:
+        return [(0, 1), (-1, 0), (0, -1), (1, 0)][self]
 
-@attrs.frozen
-class Beam:
-    row: int
-    col: int
-    direction: Direction
-
-    def advance(self) -> Beam:
-        dr = {Direction.Up: -1, Direction.Down: 1}.get(self.direction, 0)
-        dc = {Direction.Left: -1, Direction.Right: 1}.get(self.direction, 0)
-        return Beam(self.row + dr, self.col + dc, self.direction)
-
-    def process(self, tile: str) -> list[Beam]:
+    def process(self, tile: str) -> list[Direction]:
+        """Directions a beam moving this way leaves tile in"""
         if tile == "/":
-            return [
-                attrs.evolve(
-                    self,
-                    direction={
-                        Direction.Left: Direction.Down,
-                        Direction.Right: Direction.Up,
-                        Direction.Down: Direction.Left,
-                        Direction.Up: Direction.Right,
-                    }[self.direction],
-                )
-            ]
-        elif tile == "\\":
-            return [
-                attrs.evolve(
-                    self,
-                    direction={
-                        Direction.Left: Direction.Up,
-                        Direction.Right: Direction.Down,
-                        Direction.Up: Direction.Left,
-                        Direction.Down: Direction.Right,
-                    }[self.direction],
-                )
-            ]
-        elif tile == "|" and self.direction in {Direction.Left, Direction.Right}:
-            return [
-                attrs.evolve(self, direction=Direction.Up),
-                attrs.evolve(self, direction=Direction.Down),
-            ]
-        elif tile == "-" and self.direction in {Direction.Up, Direction.Down}:
-            return [
-                attrs.evolve(self, direction=Direction.Left),
-                attrs.evolve(self, direction=Direction.Right),
-            ]
+            return [Direction(self ^ 1)]
+        if tile == "\\":
+            return [Direction(3 - self)]
+        if tile == "|" and self in {Direction.Left, Direction.Right}:
+            return [Direction.Up, Direction.Down]
+        if tile == "-" and self in {Direction.Up, Direction.Down}:
+            return [Direction.Left, Direction.Right]
         return [self]
 
 
-@attrs.frozen
-class BeamGrid:
+# A beam arriving at a non-empty tile, as (row, col, direction of travel).
+Node = tuple[int, int, Direction]
+
+
+@attrs.frozen(slots=False)
+class BeamGraph:
+    """Beams between non-empty tiles, condensed into strongly connected components.
+
+    Energized tiles are bitsets over row * n_cols + col, memoized per component
+    so that every starting beam shares the work.
+    """
+
     layout: list[str]
-    active_beams: set[Beam]
-    processed_beams: set[Beam] = field(factory=set)
-
-    def is_in_bounds(self, beam: Beam) -> bool:
-        return 0 <= beam.row < len(self.layout) and 0 <= beam.col < len(
-            self.layout[beam.row]
-        )
-
-    def step(self) -> BeamGrid:
-        new_beams = set()
-        processed_beams = self.active_beams | self.processed_beams
-        for beam in self.active_beams:
-            tile = self.layout[beam.row][beam.col]
-            for rotated in beam.process(tile):
-                new_beam = rotated.advance()
-                if self.is_in_bounds(new_beam):
-                    new_beams.add(new_beam)
-        new_beams -= processed_beams
-        return evolve(self, active_beams=new_beams, processed_beams=processed_beams)
-
-    def num_energized(self) -> int:
-        grid = self
-        while grid.active_beams:
-            grid = grid.step()
-        return len({(beam.row, beam.col) for beam in grid.processed_beams})
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.layout[0])
+
+    def walk(self, r: int, c: int, direction: Direction) -> tuple[int, Node | None]:
+        """Follows a beam from (r, c) through empty tiles.
+
+        Returns the tiles passed and the non-empty tile it arrives at, if any.
+        """
+        dr, dc = direction.delta
+        tiles = 0
+        while 0 <= r < len(self.layout) and 0 <= c < self.n_cols:
+            if self.layout[r][c] != ".":
+                return tiles, (r, c, direction)
+            tiles |= 1 << (r * self.n_cols + c)
+            r, c = r + dr, c + dc
+        return tiles, None
+
+    @cached_property
+    def edges(self) -> dict[Node, tuple[int, list[Node]]]:
+        """Each node's own tiles (up to the next nodes) and the nodes it reaches"""
+        edges = {}
+        for r, row in enumerate(self.layout):
+            for c, tile in enumerate(row):
+                if tile == ".":
+                    continue
+                for direction in Direction:
+                    tiles = 1 << (r * self.n_cols + c)
+                    successors = []
+                    for out in direction.process(tile):
+                        dr, dc = out.delta
+                        walked, successor = self.walk(r + dr, c + dc, out)
+                        tiles |= walked
+                        if successor is not None:
+                            successors.append(successor)
+                    edges[(r, c, direction)] = (tiles, successors)
+        return edges
+
+    @cached_property
+    def energized_tiles(self) -> dict[Node, int]:
+        """Tiles energized by a beam arriving at each node"""
+        # Tarjan's algorithm, iteratively. Components are completed in reverse
+        # topological order, so each one's successors are already known.
+        index: dict[Node, int] = {}
+        low: dict[Node, int] = {}
+        stack: list[Node] = []
+        on_stack: set[Node] = set()
+        res: dict[Node, int] = {}
+
+        for root in self.edges:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, i = work.pop()
+                if i == 0:
+                    index[node] = low[node] = len(index)
+                    stack.append(node)
+                    on_stack.add(node)
+                successors = self.edges[node][1]
+                if i < len(successors):
+                    work.append((node, i + 1))
+                    successor = successors[i]
+                    if successor not in index:
+                        work.append((successor, 0))
+                    elif successor in on_stack:
+                        low[node] = min(low[node], index[successor])
+                    continue
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    tiles = 0
+                    for member in component:
+                        own_tiles, member_successors = self.edges[member]
+                        tiles |= own_tiles
+                        for successor in member_successors:
+                            tiles |= res.get(successor, 0)
+                    for member in component:
+                        res[member] = tiles
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+        return res
+
+    def num_energized(self, r: int, c: int, direction: Direction) -> int:
+        tiles, node = self.walk(r, c, direction)
+        if node is not None:
+            tiles |= self.energized_tiles[node]
+        return tiles.bit_count()
 
 
 def main():
-    layout = [line.strip() for line in sys.stdin]
-    grids = []
-    grids.extend(
-        BeamGrid(layout=layout, active_beams={Beam(r, 0, Direction.Right)})
-        for r in range(len(layout))
-    )
-    grids.extend(
-        BeamGrid(
-            layout=layout, active_beams={Beam(r, len(layout[0]) - 1, Direction.Left)}
-        )
-        for r in range(len(layout))
-    )
-    grids.extend(
-        BeamGrid(layout=layout, active_beams={Beam(0, c, Direction.Down)})
-        for c in range(len(layout[0]))
-    )
-    grids.extend(
-        BeamGrid(layout=layout, active_beams={Beam(len(layout) - 1, c, Direction.Up)})
-        for c in range(len(layout[0]))
-    )
-
-    print(f"Part 1: {grids[0].num_energized()}")
-
-    with Pool((os.cpu_count() or 2) - 1) as p:
-        energized_nums = p.map(BeamGrid.num_energized, grids)
-    print(f"Part 2: {max(energized_nums)}")
+    layout = [line.strip() for line in sys.stdin if line.strip()]
+    graph = BeamGraph(layout)
+    n_rows, n_cols = len(layout), len(layout[0])
+
+    starts = [
+        *((r, 0, Direction.Right) for r in range(n_rows)),
+        *((r, n_cols - 1, Direction.Left) for r in range(n_rows)),
+        *((0, c, Direction.Down) for c in range(n_cols)),
+        *((n_rows - 1, c, Direction.Up) for c in range(n_cols)),
+    ]
+
+    print(f"Part 1: {graph.num_energized(*starts[0])}")
+    print(f"Part 2: {max(graph.num_energized(*start) for start in starts)}")
 
 
 if __name__ == "__main__":
@@ -2,105 +2,124 @@ from __future__ import annotations
 
 import heapq
 import sys
-from collections.abc import Callable
-from enum import Enum
-from typing import TypeVar
 
 import attrs
 
-T = TypeVar("T")
+# Right, down, left, up, so the opposite of direction d is (d + 2) % 4.
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
 
 
-def dijkstra(
-    start: T,
-    neighbor_fn: Callable[[T], list[tuple[float, T]]],
-    is_end_fn: Callable[[T], bool],
-) -> float | None:
-    dists: dict[T, float] = {}
-    heap: list[tuple[float, T]] = [(0, start)]
+@attrs.frozen
+class Search:
+    heat_loss: int | None
+    n_expanded: int
+
+
+def goal_distances(blocks: list[list[int]]) -> list[int]:
+    """Heat loss from each block to the bottom right one, ignoring run limits"""
+    n_rows, n_cols = len(blocks), len(blocks[0])
+    goal = n_rows * n_cols - 1
+    dist = [sys.maxsize] * (n_rows * n_cols)
+    dist[goal] = 0
+    heap = [(0, goal)]
     while heap:
-        d, u = heapq.heappop(heap)
-        if u in dists:
+        d, pos = heapq.heappop(heap)
+        if d != dist[pos]:
             continue
-        if is_end_fn(u):
-            return d
-        dists[u] = d
-        for cost, v in neighbor_fn(u):
-            if v not in dists:
-                heapq.heappush(heap, (d + cost, v))
-    return None
-
-
-class Direction(Enum):
-    Left = (0, -1)
-    Right = (0, 1)
-    Up = (-1, 0)
-    Down = (1, 0)
-
-    def __lt__(self, other: Direction) -> bool:
-        return self.value < other.value
-
-    @property
-    def opposite(self) -> Direction:
-        return {
-            self.Left: self.Right,
-            self.Right: self.Left,
-            self.Up: self.Down,
-            self.Down: self.Up,
-        }[self]
-
-
-@attrs.frozen(order=True)
-class Node:
-    r: int
-    c: int
-    direction: Direction
-    consecutive: int
-
-    def get_directions(self) -> list[Direction]:
-        directions = [d for d in Direction if d != self.direction.opposite]
-        if self.consecutive == 3:
-            directions.remove(self.direction)
-        return directions
-
-    def get_directions_ultra(self) -> list[Direction]:
-        if 0 < self.consecutive < 4:
-            return [self.direction]
-
-        directions = [d for d in Direction if d != self.direction.opposite]
-        if self.consecutive == 10:
-            directions.remove(self.direction)
-        return directions
-
-
-def get_neighbors(
-    node: Node, blocks: list[list[int]], directions: list[Direction]
-) -> list[tuple[float, Node]]:
-    nodes = []
-    for direction in directions:
-        dr, dc = direction.value
-        r, c = node.r + dr, node.c + dc
-        consecutive = 1 if direction != node.direction else (node.consecutive + 1)
-        if 0 <= r < len(blocks) and 0 <= c < len(blocks[r]):
-            nodes.append((blocks[r][c], Node(r, c, direction, consecutive)))
-    return nodes
+        r, c = divmod(pos, n_cols)
+        # Moving from a neighbor onto pos costs pos's block.
+        for dr, dc in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < n_rows and 0 <= nc < n_cols):
+                continue
+            neighbor = nr * n_cols + nc
+            new_dist = d + blocks[r][c]
+            if new_dist < dist[neighbor]:
+                dist[neighbor] = new_dist
+                heapq.heappush(heap, (new_dist, neighbor))
+    return dist
+
+
+def min_heat_loss(
+    blocks: list[list[int]], min_run: int, max_run: int, a_star: bool = True
+) -> Search:
+    """Searches from the top left to the bottom right block with a bucket queue.
+
+    The crucible must move between min_run and max_run blocks in a straight line
+    before turning or stopping. States (position, direction, run length) are
+    packed into ints indexing flat lists. With a_star, states are ordered by
+    heat loss so far plus goal_distances, which never overestimates, so fewer
+    states are expanded than with plain Dijkstra.
+    """
+    n_rows, n_cols = len(blocks), len(blocks[0])
+    costs = [cost for row in blocks for cost in row]
+    goal = n_rows * n_cols - 1
+    estimate = goal_distances(blocks) if a_star else [0] * len(costs)
+    n_runs = max_run + 1
+    n_states = n_rows * n_cols * len(DIRECTIONS) * n_runs
+
+    dist = [sys.maxsize] * n_states
+    done = bytearray(n_states)
+    # A step adds its block's cost to the heat loss and, as the estimate is
+    # consistent, changes the estimate by at most one block's cost. So queued
+    # priorities are within 2 * max(costs) of the current one and a ring of
+    # buckets suffices.
+    buckets: list[list[int]] = [[] for _ in range(2 * max(costs) + 1)]
+
+    # A run of 0 marks the start, where any direction may be taken.
+    dist[0] = 0
+    buckets[estimate[0] % len(buckets)].append(0)
+    n_queued = 1
+    n_expanded = 0
+    priority = estimate[0]
+    while n_queued:
+        bucket = buckets[priority % len(buckets)]
+        while bucket:
+            state = bucket.pop()
+            n_queued -= 1
+            rest, run = divmod(state, n_runs)
+            pos, direction = divmod(rest, len(DIRECTIONS))
+            d = dist[state]
+            if done[state] or d + estimate[pos] != priority:
+                continue
+            done[state] = 1
+            n_expanded += 1
+
+            # A run of 0 here means the start is the goal, so nothing moves.
+            if pos == goal and (run >= min_run or run == 0):
+                return Search(d, n_expanded)
+
+            r, c = divmod(pos, n_cols)
+            for new_direction, (dr, dc) in enumerate(DIRECTIONS):
+                if new_direction == direction:
+                    if run == max_run:
+                        continue
+                    new_run = run + 1
+                else:
+                    if new_direction == (direction + 2) % 4 or 0 < run < min_run:
+                        continue
+                    new_run = 1
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < n_rows and 0 <= nc < n_cols):
+                    continue
+                new_pos = nr * n_cols + nc
+                new_state = (new_pos * len(DIRECTIONS) + new_direction) * n_runs
+                new_state += new_run
+                new_dist = d + costs[new_pos]
+                if new_dist < dist[new_state]:
+                    dist[new_state] = new_dist
+                    new_priority = new_dist + estimate[new_pos]
+                    buckets[new_priority % len(buckets)].append(new_state)
+                    n_queued += 1
+        priority += 1
+    return Search(None, n_expanded)
 
 
 def main():
-    blocks = [[int(c) for c in line.strip()] for line in sys.stdin]
-    start = Node(0, 0, Direction.Right, 0)
-
-    def is_end(node: Node) -> bool:
-        return node.r == len(blocks) - 1 and node.c == len(blocks[0]) - 1
-
-    def neighbor_fn(node: Node) -> list[tuple[float, Node]]:
-        return get_neighbors(node, blocks, node.get_directions())
-
-    def neighbor_fn_ultra(node: Node) -> list[tuple[float, Node]]:
-        return get_neighbors(node, blocks, node.get_directions_ultra())
+    blocks = [[int(c) for c in line.strip()] for line in sys.stdin if line.strip()]
 
-    print(f"Part 1: {dijkstra(start, neighbor_fn, is_end)}")
-    print(f"Part 2: {dijkstra(start, neighbor_fn_ultra, is_end)}")
+    print(f"Part 1: {min_heat_loss(blocks, min_run=1, max_run=3).heat_loss}")
+    print(f"Part 2: {min_heat_loss(blocks, min_run=4, max_run=10).heat_loss}")
 
 
 if __name__ == "__main__":
@@ -1,57 +1,50 @@
 from __future__ import annotations
 
-import itertools
 import sys
 
 import attrs
 
+# Unit vectors for R, D, L, U, which is also the order of part 2's direction digit.
+UNITS = [(1, 0), (0, -1), (-1, 0), (0, 1)]
+DIRECTION_TO_UNIT = dict(zip("RDLU", UNITS))
 
-@attrs.define
-class Vector2:
-    x: int
-    y: int
-
-    def __add__(self, other: Vector2) -> Vector2:
-        return Vector2(self.x + other.x, self.y + other.y)
-
-    def __mul__(self, scalar: int) -> Vector2:
-        return Vector2(self.x * scalar, self.y * scalar)
 
-    def __abs__(self) -> float:
-        return (self.x**2 + self.y**2) ** 0.5
-
-    def cross(self, other: Vector2) -> int:
-        return self.x * other.y - other.x * self.y
+@attrs.define
+class Lagoon:
+    """Running totals over a dig plan, consumed one instruction at a time"""
 
+    x: int = 0
+    y: int = 0
+    twice_area: int = 0
+    boundary_points: int = 0
 
-def num_contained_points(side_vectors: list[Vector2]) -> int:
-    points = [Vector2(0, 0)]
-    for vector in side_vectors:
-        points.append(points[-1] + vector)
+    def dig(self, unit: tuple[int, int], length: int) -> None:
+        dx, dy = unit
+        x, y = self.x + dx * length, self.y + dy * length
+        # Shoelace formula, one edge at a time.
+        self.twice_area += self.x * y - x * self.y
+        self.boundary_points += length
+        self.x, self.y = x, y
 
-    area = abs(sum(u.cross(v) for u, v in itertools.pairwise(points))) / 2
-    boundary_points = sum(abs(vector) for vector in side_vectors)
-    interior_points = area - boundary_points / 2 + 1  # by Pick's theorem
-    return int(interior_points + boundary_points)
+    @property
+    def num_contained_points(self) -> int:
+        # By Pick's theorem, area = interior - boundary / 2 + 1.
+        twice_interior = abs(self.twice_area) - self.boundary_points + 2
+        return twice_interior // 2 + self.boundary_points
 
 
 def main():
-    vectors_p1 = []
-    vectors_p2 = []
-
-    units = [Vector2(1, 0), Vector2(0, -1), Vector2(-1, 0), Vector2(0, 1)]
-    direction_to_unit = dict(zip("RDLU", units))
-
+    lagoon_p1 = Lagoon()
+    lagoon_p2 = Lagoon()
     for line in sys.stdin:
-        direction, length, color = line.strip().split()
-        vectors_p1.append(direction_to_unit[direction] * int(length))
-
-        length_p2 = int(color[2:7], 16)
-        unit_p2 = units[int(color[7])]
-        vectors_p2.append(unit_p2 * length_p2)
-
-    print(f"Part 1: {num_contained_points(vectors_p1)}")
-    print(f"Part 2: {num_contained_points(vectors_p2)}")
+        if not line.strip():
+            continue
+        direction, length, color = line.split()
+        lagoon_p1.dig(DIRECTION_TO_UNIT[direction], int(length))
+        lagoon_p2.dig(UNITS[int(color[7])], int(color[2:7], 16))
+
+    print(f"Part 1: {lagoon_p1.num_contained_points}")
+    print(f"Part 2: {lagoon_p2.num_contained_points}")
 
 
 if __name__ == "__main__":
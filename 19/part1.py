@@ -1,67 +1,124 @@
 from __future__ import annotations
 
+import re
 import sys
 
 import attrs
+import numpy as np
 
-
-@attrs.frozen
-class Rating:
-    x: int
-    m: int
-    a: int
-    s: int
-
-    @classmethod
-    def parse(cls, line: str) -> Rating:
-        x, m, a, s = (
-            int(pair.split("=")[1]) for pair in line.lstrip("{").rstrip("}").split(",")
-        )
-        return cls(x, m, a, s)
-
-    @property
-    def value(self) -> int:
-        return self.x + self.m + self.a + self.s
+ATTRIBUTES = "xmas"
+LESS, GREATER, ALWAYS = range(3)
+# Workflow ids of the two terminal states; real workflows are numbered after.
+ACCEPT, REJECT = 0, 1
 
 
 @attrs.frozen
 class Rule:
-    expr: str
+    attribute: int
+    op: int
+    threshold: int
     destination: str
 
+    @classmethod
+    def parse(cls, rule_spec: str) -> Rule:
+        if ":" not in rule_spec:
+            return cls(0, ALWAYS, 0, rule_spec)
+        expr, destination = rule_spec.split(":")
+        op = LESS if expr[1] == "<" else GREATER
+        return cls(ATTRIBUTES.index(expr[0]), op, int(expr[2:]), destination)
+
 
 @attrs.frozen
 class Workflow:
     name: str
     rules: list[Rule]
 
-    def apply(self, rating: Rating) -> str:
-        for rule in self.rules:
-            if eval(rule.expr, attrs.asdict(rating)):
-                return rule.destination
-        raise AssertionError
-
     @classmethod
     def parse(cls, line: str) -> Workflow:
         name, rules_str = line.rstrip("}").split("{")
-        rules = []
-        for rule_spec in rules_str.split(","):
-            if ":" in rule_spec:
-                rules.append(Rule(*rule_spec.split(":")))
-            else:
-                rules.append(Rule("True", rule_spec))
-        return cls(name, rules)
+        return cls(name, [Rule.parse(spec) for spec in rules_str.split(",")])
 
 
 @attrs.frozen
-class WorkflowMap:
-    workflows: dict[str, Workflow]
+class DecisionTable:
+    """Every workflow's rules flattened into parallel lists.
+
+    Workflow w owns rules first_rule[w] up to first_rule[w + 1], and rule
+    targets are workflow ids rather than names.
+    """
 
-    def accepts(self, rating: Rating) -> bool:
-        cur = "in"
-        while cur not in {"A", "R"}:
-            cur = self.workflows[cur].apply(rating)
-        return cur == "A"
+    start: int
+    first_rule: list[int]
+    attribute: list[int]
+    op: list[int]
+    threshold: list[int]
+    target: list[int]
+
+    @classmethod
+    def compile(cls, workflows: list[Workflow]) -> DecisionTable:
+        ids = {"A": ACCEPT, "R": REJECT}
+        ids.update((w.name, i) for i, w in enumerate(workflows, start=len(ids)))
+        table = cls(ids["in"], [0] * (len(ids) + 1), [], [], [], [])
+        for w in workflows:
+            table.first_rule[ids[w.name]] = len(table.target)
+            for rule in w.rules:
+                table.attribute.append(rule.attribute)
+                table.op.append(rule.op)
+                table.threshold.append(rule.threshold)
+                table.target.append(ids[rule.destination])
+            table.first_rule[ids[w.name] + 1] = len(table.target)
+        return table
+
+    def rules(self, workflow: int) -> range:
+        return range(self.first_rule[workflow], self.first_rule[workflow + 1])
+
+    def accepts(self, rating: tuple[int, ...]) -> bool:
+        cur = self.start
+        while cur not in (ACCEPT, REJECT):
+            for i in self.rules(cur):
+                value = rating[self.attribute[i]]
+                op = self.op[i]
+                if (
+                    op == ALWAYS
+                    or (op == LESS and value < self.threshold[i])
+                    or (op == GREATER and value > self.threshold[i])
+                ):
+                    cur = self.target[i]
+                    break
+        return cur == ACCEPT
+
+    def accepted(self, ratings: np.ndarray) -> np.ndarray:
+        """Which rows of ratings are accepted, routing each workflow's rows at once"""
+        res = np.zeros(len(ratings), dtype=bool)
+        pending = [(self.start, np.arange(len(ratings)))]
+        while pending:
+            workflow, rows = pending.pop()
+            for i in self.rules(workflow):
+                if not rows.size:
+                    break
+                op = self.op[i]
+                if op == ALWAYS:
+                    matched = np.ones(rows.size, dtype=bool)
+                else:
+                    values = ratings[rows, self.attribute[i]]
+                    if op == LESS:
+                        matched = values < self.threshold[i]
+                    else:
+                        matched = values > self.threshold[i]
+                target = self.target[i]
+                if target == ACCEPT:
+                    res[rows[matched]] = True
+                elif target != REJECT:
+                    pending.append((target, rows[matched]))
+                rows = rows[~matched]
+        return res
+
+
+def parse_ratings(lines: list[str]) -> np.ndarray:
+    return np.array(
+        [[int(x) for x in re.findall(r"\d+", line)] for line in lines if line],
+        dtype=np.int64,
+    ).reshape(-1, len(ATTRIBUTES))
 
 
 def main():
@@ -69,10 +126,10 @@ def main():
         s.split("\n") for s in sys.stdin.read().split("\n\n")
     )
 
-    workflow_map = WorkflowMap({w.name: w for w in map(Workflow.parse, workflow_lines)})
-    ratings = [Rating.parse(line) for line in rating_lines]
+    table = DecisionTable.compile([Workflow.parse(w) for w in workflow_lines])
+    ratings = parse_ratings(rating_lines)
 
-    print(f"Part 1: {sum(r.value for r in ratings if workflow_map.accepts(r))}")
+    print(f"Part 1: {ratings[table.accepted(ratings)].sum()}")
 
 
 if __name__ == "__main__":
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+import math
 import sys
 
 import attrs
 
+# Half-open (low, high) ranges, one per attribute.
+Box = tuple[tuple[int, int], ...]
+
+
+def volume(box: Box) -> int:
+    return math.prod(high - low for low, high in box)
+
 
 @attrs.frozen
 class Rule:
-    variable: str
-    destination: str
-    min_val: int = 1
-    max_val: int = 4001
+    """Sends values with min_val <= variable < max_val to destination.
 
-    @property
-    def complement(self) -> Rule:
-        assert (self.min_val == 1) ^ (self.max_val == 4001)
-        min_val = self.max_val if self.max_val != 4001 else 1
-        max_val = self.min_val if self.min_val != 1 else 4001
-        return Rule(self.variable, self.destination, min_val, max_val)
+    A rule without a variable matches everything.
+    """
+
+    destination: str
+    variable: str | None = None
+    min_val: int | None = None
+    max_val: int | None = None
+
+    def split(self, box: Box, attributes: str) -> tuple[Box | None, Box | None]:
+        """The parts of box this rule matches and doesn't, None when empty"""
+        if self.variable is None:
+            return box, None
+        i = attributes.index(self.variable)
+        low, high = box[i]
+        cut = self.max_val if self.max_val is not None else self.min_val
+        cut = min(max(cut, low), high)
+        below = (*box[:i], (low, cut), *box[i + 1 :]) if low < cut else None
+        above = (*box[:i], (cut, high), *box[i + 1 :]) if cut < high else None
+        return (below, above) if self.max_val is not None else (above, below)
 
 
 @attrs.frozen
@@ -34,49 +52,68 @@ class Workflow:
                 expr, dest = rule_spec.split(":")
                 if "<" in expr:
                     variable, constraint = expr.split("<")
-                    rules.append(Rule(variable, dest, max_val=int(constraint)))
+                    rules.append(Rule(dest, variable, max_val=int(constraint)))
                 else:
                     variable, constraint = expr.split(">")
-                    rules.append(Rule(variable, dest, min_val=int(constraint) + 1))
+                    rules.append(Rule(dest, variable, min_val=int(constraint) + 1))
             else:
-                rules.append(Rule("x", rule_spec))
+                rules.append(Rule(rule_spec))
         return cls(name, rules)
 
 
-def ways_to_satisfy(rules: list[Rule]) -> int:
-    ways = 1
-    for variable in "xmas":
-        min_val = max(
-            (rule.min_val for rule in rules if rule.variable == variable), default=1
-        )
-        max_val = min(
-            (rule.max_val for rule in rules if rule.variable == variable), default=4001
-        )
-        ways *= max(max_val - min_val, 0)
-    return ways
-
-
 @attrs.frozen
 class WorkflowMap:
+    """Workflows over ratings with each attribute in an inclusive range.
+
+    Accepted regions are found by splitting a box at every rule and are
+    memoized per (workflow, box).
+    """
+
     workflows: dict[str, Workflow]
+    ranges: dict[str, tuple[int, int]] = attrs.field(
+        factory=lambda: dict.fromkeys("xmas", (1, 4000))
+    )
+    _cache: dict[tuple[str, Box], list[Box]] = attrs.field(
+        factory=dict, init=False, eq=False, repr=False
+    )
 
-    def _count_ways(self, label: str, rules: list[Rule]) -> int:
+    @property
+    def attributes(self) -> str:
+        return "".join(self.ranges)
+
+    @property
+    def full_box(self) -> Box:
+        return tuple((low, high + 1) for low, high in self.ranges.values())
+
+    def accepted_boxes(self, label: str = "in", box: Box | None = None) -> list[Box]:
+        """Disjoint boxes covering the ratings in box that label accepts"""
+        if box is None:
+            box = self.full_box
         if label == "A":
-            return ways_to_satisfy(rules)
+            return [box]
         if label == "R":
-            return 0
-        workflow = self.workflows[label]
-        return sum(
-            self._count_ways(
-                rule.destination,
-                [*rules, *(r.complement for r in workflow.rules[:i]), rule],
-            )
-            for i, rule in enumerate(workflow.rules)
+            return []
+        if (label, box) not in self._cache:
+            res = []
+            rest: Box | None = box
+            for rule in self.workflows[label].rules:
+                matched, rest = rule.split(rest, self.attributes)
+                if matched is not None:
+                    res.extend(self.accepted_boxes(rule.destination, matched))
+                if rest is None:
+                    break
+            self._cache[(label, box)] = res
+        return self._cache[(label, box)]
+
+    def count_ways(self, label: str = "in", box: Box | None = None) -> int:
+        return sum(volume(b) for b in self.accepted_boxes(label, box))
+
+    def accepts(self, rating: tuple[int, ...]) -> bool:
+        return any(
+            all(low <= value < high for value, (low, high) in zip(rating, box))
+            for box in self.accepted_boxes()
         )
 
-    def count_ways(self) -> int:
-        return self._count_ways("in", [])
-
 
 def main():
     workflow_lines, _ = (s.split("\n") for s in sys.stdin.read().split("\n\n"))
@@ -0,0 +1,223 @@
+"""Benchmark every day's solution against its puzzle input.
+
+Each script is loaded with importlib and its ``main`` is run with stdin
+replaced by the input file, so the scripts themselves need no changes. Phases
+are inferred from I/O:
+
+- import: executing the module body (imports, constants, class definitions)
+- read: from calling ``main`` until the last stdin read before any output
+- part N: from the end of the previous phase until the Nth printed line
+
+Read only covers the I/O, plus any parsing interleaved with it. Scripts that
+slurp stdin up front and parse afterwards have that parsing counted towards
+their first part.
+
+Usage: python bench.py [DAY ...] [-n RUNS] [--input input.in] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import io
+import json
+import statistics
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import attrs
+
+ROOT = Path(__file__).resolve().parent
+
+
+class _TimedBuffer(io.BytesIO):
+    """Binary stdin that remembers when it was last read from."""
+
+    last_read: float = 0.0
+
+    def _stamp(self, result):
+        self.last_read = time.perf_counter()
+        return result
+
+    def read(self, size=-1):
+        return self._stamp(super().read(size))
+
+    def read1(self, size=-1):
+        return self._stamp(super().read1(size))
+
+    def readinto(self, buffer):
+        return self._stamp(super().readinto(buffer))
+
+    def readinto1(self, buffer):
+        return self._stamp(super().readinto1(buffer))
+
+    def readline(self, size=-1):
+        return self._stamp(super().readline(size))
+
+    def __next__(self):
+        return self._stamp(super().__next__())
+
+
+class _TimedStdout(io.TextIOBase):
+    """Captures output and the time each line was completed."""
+
+    def __init__(self, stdin: _TimedBuffer):
+        self.stdin = stdin
+        self.read_end: float | None = None
+        self.line_times: list[float] = []
+        self.chunks: list[str] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self.chunks.append(s)
+        for _ in range(s.count("\n")):
+            now = time.perf_counter()
+            if self.read_end is None:
+                self.read_end = self.stdin.last_read or now
+            self.line_times.append(now)
+        return len(s)
+
+    @property
+    def lines(self) -> list[str]:
+        return "".join(self.chunks).splitlines()
+
+
+@attrs.frozen
+class Run:
+    wall: float
+    import_: float
+    read: float
+    parts: list[float]
+    output: list[str]
+
+
+@attrs.frozen
+class Script:
+    path: Path
+
+    @property
+    def name(self) -> str:
+        return f"{self.path.parent.name}/{self.path.stem}"
+
+    @property
+    def module_name(self) -> str:
+        return f"day{self.path.parent.name}_{self.path.stem}"
+
+    def run_once(self, data: bytes) -> Run:
+        stdin_buffer = _TimedBuffer(data)
+        stdout = _TimedStdout(stdin_buffer)
+        old_stdin, old_stdout = sys.stdin, sys.stdout
+        sys.stdin = io.TextIOWrapper(stdin_buffer, encoding="utf-8")
+        sys.stdout = stdout
+        try:
+            t0 = time.perf_counter()
+            spec = importlib.util.spec_from_file_location(self.module_name, self.path)
+            module = importlib.util.module_from_spec(spec)
+            # Registered so multiprocessing workers can unpickle its classes.
+            sys.modules[self.module_name] = module
+            spec.loader.exec_module(module)
+            t1 = time.perf_counter()
+            module.main()
+            t2 = time.perf_counter()
+        finally:
+            sys.stdin, sys.stdout = old_stdin, old_stdout
+            sys.modules.pop(self.module_name, None)
+
+        read_end = stdout.read_end if stdout.read_end is not None else t2
+        marks = [max(t1, read_end), *stdout.line_times]
+        parts = [b - a for a, b in zip(marks, marks[1:])]
+        return Run(
+            wall=t2 - t0,
+            import_=t1 - t0,
+            read=marks[0] - t1,
+            parts=parts,
+            output=stdout.lines,
+        )
+
+
+def discover(days: list[str]) -> list[Script]:
+    scripts = sorted(ROOT.glob("[0-9][0-9]/*.py"))
+    if days:
+        wanted = {d.zfill(2) for d in days}
+        scripts = [p for p in scripts if p.parent.name in wanted]
+    return [Script(p) for p in scripts]
+
+
+def summarize(script: Script, runs: list[Run]) -> dict:
+    n_parts = max(len(r.parts) for r in runs)
+    return {
+        "name": script.name,
+        "runs": len(runs),
+        "wall": statistics.median(r.wall for r in runs),
+        "import": statistics.median(r.import_ for r in runs),
+        "read": statistics.median(r.read for r in runs),
+        "parts": [
+            statistics.median(r.parts[i] for r in runs if i < len(r.parts))
+            for i in range(n_parts)
+        ],
+        "output": runs[-1].output,
+    }
+
+
+def format_table(results: list[dict]) -> str:
+    def ms(seconds: float | None) -> str:
+        return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+    ok = [r for r in results if "error" not in r]
+    n_parts = max((len(r["parts"]) for r in ok), default=0)
+    header = ["script", "wall ms", "import ms", "read ms"]
+    header += [f"part {i + 1} ms" for i in range(n_parts)]
+    rows = [header]
+    for r in ok:
+        parts = r["parts"] + [None] * (n_parts - len(r["parts"]))
+        rows.append(
+            [r["name"], ms(r["wall"]), ms(r["import"]), ms(r["read"])]
+            + [ms(p) for p in parts]
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = [
+        "  ".join(
+            cell.ljust(w) if i == 0 else cell.rjust(w)
+            for i, (cell, w) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    ]
+    lines.extend(f"{r['name']}: {r['error']}" for r in results if "error" in r)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("days", nargs="*", help="days to run, e.g. 1 07 19")
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--input", default="input.in", help="input file in each day")
+    parser.add_argument("--json", type=Path, help="write results as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    for script in discover(args.days):
+        input_path = script.path.parent / args.input
+        if not input_path.exists():
+            results.append({"name": script.name, "error": f"no {args.input}"})
+            continue
+        data = input_path.read_bytes()
+        try:
+            runs = [script.run_once(data) for _ in range(args.runs)]
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            results.append({"name": script.name, "error": f"{type(e).__name__}: {e}"})
+            continue
+        results.append(summarize(script, runs))
+
+    print(format_table(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()